@@ -1,24 +1,47 @@
 import os
+import time
+import hmac
 import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from functools import wraps
 from pathlib import Path
 
+import orjson
+from cachetools import TTLCache
 from flask import Flask, render_template, request, jsonify, redirect, url_for, send_file, flash
+from flask.json.provider import JSONProvider
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import func, case, or_, and_, inspect
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload, joinedload, raiseload, make_transient_to_detached
+from argon2 import PasswordHasher
+from argon2.exceptions import VerificationError, InvalidHashError
+from werkzeug.security import check_password_hash
 
 from config import Config, BACKUP_DIR
-from models import db, User, DatabaseConfig, BackupHistory, SystemLog, Settings, BtPanelConfig, BtDatabaseConfig
+from models import db, cache, ensure_indexes, init_backup_counters, get_backup_counters, User, DatabaseConfig, BackupHistory, SystemLog, Settings, BtPanelConfig, BtDatabaseConfig, BtBackupLock
 from backup import run_backup, restore_backup, log
-from telegram_bot import sync_upload_backup, sync_send_notification
-from scheduler import scheduler, init_scheduler, update_job, remove_job, get_scheduled_jobs
+from telegram_bot import sync_send_notification
+from scheduler import scheduler, init_scheduler, update_job, remove_job, get_cached_jobs, enqueue_upload, enqueue_file_upload, enqueue_notification, JOBS_CACHE_KEY
 from bt_panel import BtPanel
 
+class ORJSONProvider(JSONProvider):
+    """使用 orjson 序列化 jsonify 响应"""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 app = Flask(__name__)
 app.config.from_object(Config)
+app.json = ORJSONProvider(app)
 
 db.init_app(app)
+cache.init_app(app)
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
@@ -26,30 +49,142 @@ login_manager.login_view = 'login'
 # API token for external calls
 API_TOKEN = None
 
+# 宝塔数据库备份文件后缀及各引擎备份目录
+BT_BACKUP_SUFFIXES = ('.sql.zip', '.sql.gz')
+BT_BACKUP_ENGINES = ('mysql', 'pgsql', 'mongodb')
+BT_CRONTAB_GRACE = 5  # 推送脚本启动后多久删除一次性计划任务（秒）
+BT_LOCK_TTL = 3600  # 进行中标记超过该时长视为任务已异常中断（秒），需大于单次备份最长耗时
+
+password_hasher = PasswordHasher(time_cost=2, memory_cost=64 * 1024, parallelism=2)
+
+def hash_password(password: str) -> str:
+    return password_hasher.hash(password)
+
+def verify_password(password_hash: str, password: str) -> bool:
+    """校验密码，兼容旧的 werkzeug pbkdf2 哈希"""
+    if not password_hash.startswith('$argon2'):
+        return check_password_hash(password_hash, password)
+    try:
+        return password_hasher.verify(password_hash, password)
+    except (VerificationError, InvalidHashError):
+        return False
+
+# 缓存已登录用户的列值（而非 ORM 对象），避免每个请求都查询 users 表
+_user_cache = TTLCache(maxsize=1024, ttl=30)
+_user_cache_lock = threading.Lock()
+_user_columns = [attr.key for attr in inspect(User).column_attrs]
+
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    uid = int(user_id)
+    with _user_cache_lock:
+        values = _user_cache.get(uid)
+    if values is not None:
+        # 每个请求用缓存的列值重建干净的 detached 对象，再并入本请求的会话，不发 SELECT
+        user = User(**values)
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+    
+    user = db.session.get(User, uid)
+    if user is not None:
+        values = {key: getattr(user, key) for key in _user_columns}
+        with _user_cache_lock:
+            _user_cache[uid] = values
+    return user
+
+def invalidate_user_cache(user_id: int):
+    with _user_cache_lock:
+        _user_cache.pop(user_id, None)
+
+# 复用 BtPanel 实例（及其连接池），面板配置修改或删除时失效
+_bt_panels: dict = {}
+_bt_panels_lock = threading.Lock()
+
+def get_bt_panel(panel: BtPanelConfig) -> BtPanel:
+    with _bt_panels_lock:
+        bt = _bt_panels.get(panel.id)
+        if bt is None:
+            bt = _bt_panels[panel.id] = BtPanel(panel.url, panel.api_key)
+    return bt
+
+def invalidate_bt_panel(panel_id: int):
+    # 不主动 close：后台任务可能仍在使用旧客户端，由垃圾回收释放连接
+    with _bt_panels_lock:
+        _bt_panels.pop(panel_id, None)
 
 def api_auth_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
         token = request.headers.get('X-API-Token')
-        if token and API_TOKEN and token == API_TOKEN:
+        if token and API_TOKEN and hmac.compare_digest(token.encode(), API_TOKEN.encode()):
             return f(*args, **kwargs)
         if current_user.is_authenticated:
             return f(*args, **kwargs)
         return jsonify({'error': 'Unauthorized'}), 401
     return decorated
 
+def eager(*options):
+    """查询加载选项；开启 SQLALCHEMY_RAISELOAD 时未预加载的关系访问直接报错，便于发现 N+1"""
+    if app.config.get('SQLALCHEMY_RAISELOAD'):
+        return (*options, raiseload('*'))
+    return options
+
+def _parse_cursor(cursor):
+    """解析 '<created_at>_<id>' 游标，无效时返回 None"""
+    ts, _, last_id = cursor.rpartition('_')
+    try:
+        return datetime.fromisoformat(ts), int(last_id)
+    except ValueError:
+        return None
+
+def _cursor_of(item):
+    return f'{item.created_at.isoformat()}_{item.id}'
+
+def keyset_page(query, model, cursor, per_page, before=''):
+    """按 (created_at, id) 倒序的游标分页，返回 (items, next_cursor, prev_cursor)
+    cursor 取其之后（更旧）的一页；before 取其之前（更新）的一页，用于上一页
+    """
+    key = _parse_cursor(before) if before else None
+    if key:
+        # 反向查询紧邻的更新记录，再翻转回倒序
+        ts, first_id = key
+        items = query.filter(or_(
+            model.created_at > ts,
+            and_(model.created_at == ts, model.id > first_id)
+        )).order_by(model.created_at.asc(), model.id.asc()).limit(per_page + 1).all()
+        if len(items) <= per_page:
+            # 已回到最前面，直接返回完整的首页
+            return keyset_page(query, model, '', per_page)
+        items = items[:per_page][::-1]
+        return items, _cursor_of(items[-1]), _cursor_of(items[0])
+    
+    key = _parse_cursor(cursor) if cursor else None
+    if key:
+        ts, last_id = key
+        query = query.filter(or_(
+            model.created_at < ts,
+            and_(model.created_at == ts, model.id < last_id)
+        ))
+    
+    items = query.order_by(model.created_at.desc(), model.id.desc()).limit(per_page + 1).all()
+    next_cursor = None
+    if len(items) > per_page:
+        items = items[:per_page]
+        next_cursor = _cursor_of(items[-1])
+    prev_cursor = _cursor_of(items[0]) if key and items else None
+    return items, next_cursor, prev_cursor
+
 # Initialize database
 with app.app_context():
     db.create_all()
+    ensure_indexes()
+    init_backup_counters()
     
     # Create default admin user
     if not User.query.filter_by(username=Config.ADMIN_USERNAME).first():
         admin = User(
             username=Config.ADMIN_USERNAME,
-            password_hash=generate_password_hash(Config.ADMIN_PASSWORD)
+            password_hash=hash_password(Config.ADMIN_PASSWORD)
         )
         db.session.add(admin)
         db.session.commit()
@@ -76,16 +211,19 @@ def login():
         password = request.form.get('password')
         user = User.query.filter_by(username=username).first()
         
+        # Check lockout before any password hashing
+        if user and user.locked_until and user.locked_until > datetime.utcnow():
+            remaining = (user.locked_until - datetime.utcnow()).seconds // 60
+            flash(f'Account locked. Try again in {remaining} minutes.', 'error')
+            return render_template('login.html')
+        
         if user:
-            # Check lockout
-            if user.locked_until and user.locked_until > datetime.utcnow():
-                remaining = (user.locked_until - datetime.utcnow()).seconds // 60
-                flash(f'Account locked. Try again in {remaining} minutes.', 'error')
-                return render_template('login.html')
-            
-            if check_password_hash(user.password_hash, password):
+            if verify_password(user.password_hash, password or ''):
                 user.login_attempts = 0
                 user.locked_until = None
+                # 旧哈希或参数变化时升级为 argon2
+                if not user.password_hash.startswith('$argon2') or password_hasher.check_needs_rehash(user.password_hash):
+                    user.password_hash = hash_password(password)
                 db.session.commit()
                 login_user(user)
                 log(f'User {username} logged in')
@@ -104,6 +242,7 @@ def login():
 @app.route('/logout')
 @login_required
 def logout():
+    invalidate_user_cache(current_user.id)
     logout_user()
     return redirect(url_for('login'))
 
@@ -112,21 +251,34 @@ def logout():
 @app.route('/')
 @login_required
 def dashboard():
-    databases = DatabaseConfig.query.all()
-    bt_databases = BtDatabaseConfig.query.all()
-    recent_backups = BackupHistory.query.order_by(BackupHistory.created_at.desc()).limit(10).all()
-    jobs = get_scheduled_jobs()
-    
-    # 统计直连数据库 + 宝塔数据库
-    total_db = len(databases) + len(bt_databases)
-    enabled_db = sum(1 for d in databases if d.enabled) + sum(1 for d in bt_databases if d.enabled)
+    # 模板只展示前5条
+    databases = DatabaseConfig.query.options(*eager()).limit(5).all()
+    bt_databases = BtDatabaseConfig.query.options(
+        *eager(selectinload(BtDatabaseConfig.panel))
+    ).limit(5).all()
+    recent_backups = BackupHistory.query.options(
+        *eager(selectinload(BackupHistory.database))
+    ).order_by(BackupHistory.created_at.desc()).limit(10).all()
+    jobs = get_cached_jobs()
+    
+    # 统计直连数据库 + 宝塔数据库（在SQL中聚合）
+    db_total, db_enabled = db.session.query(
+        func.count(DatabaseConfig.id),
+        func.sum(case((DatabaseConfig.enabled.is_(True), 1), else_=0))
+    ).one()
+    bt_total, bt_enabled = db.session.query(
+        func.count(BtDatabaseConfig.id),
+        func.sum(case((BtDatabaseConfig.enabled.is_(True), 1), else_=0))
+    ).one()
+    
+    counters = get_backup_counters()
     
     stats = {
-        'total_databases': total_db,
-        'enabled_databases': enabled_db,
-        'total_backups': BackupHistory.query.count(),
-        'successful_backups': BackupHistory.query.filter_by(status='success').count(),
-        'failed_backups': BackupHistory.query.filter_by(status='failed').count(),
+        'total_databases': db_total + bt_total,
+        'enabled_databases': (db_enabled or 0) + (bt_enabled or 0),
+        'total_backups': counters['total'],
+        'successful_backups': counters['success'],
+        'failed_backups': counters['failed'],
     }
     
     return render_template('dashboard.html', 
@@ -147,7 +299,7 @@ def databases():
 @app.route('/api/databases', methods=['GET'])
 @api_auth_required
 def api_get_databases():
-    databases = DatabaseConfig.query.all()
+    databases = DatabaseConfig.query.options(selectinload(DatabaseConfig.last_backup)).all()
     return jsonify([d.to_dict() for d in databases])
 
 @app.route('/api/databases', methods=['POST'])
@@ -217,7 +369,8 @@ def api_update_database(id):
 @app.route('/api/databases/<int:id>', methods=['DELETE'])
 @api_auth_required
 def api_delete_database(id):
-    db_config = DatabaseConfig.query.get_or_404(id)
+    # backups 为 lazy='raise'，级联删除前显式加载
+    db_config = DatabaseConfig.query.options(selectinload(DatabaseConfig.backups)).get_or_404(id)
     name = db_config.name
     
     remove_job(id)
@@ -232,12 +385,12 @@ def api_delete_database(id):
 @app.route('/backups')
 @login_required
 def backups():
-    page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor', '')
+    before = request.args.get('before', '')
     per_page = 20
-    backups = BackupHistory.query.order_by(BackupHistory.created_at.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
-    return render_template('backups.html', backups=backups)
+    query = BackupHistory.query.options(*eager(selectinload(BackupHistory.database)))
+    backups, next_cursor, prev_cursor = keyset_page(query, BackupHistory, cursor, per_page, before)
+    return render_template('backups.html', backups=backups, next_cursor=next_cursor, prev_cursor=prev_cursor)
 
 @app.route('/api/backup/<int:db_id>', methods=['POST'])
 @api_auth_required
@@ -247,16 +400,16 @@ def api_trigger_backup(db_id):
     backup = run_backup(db_config)
     
     if backup.status == 'success':
-        # Upload to Telegram
-        sync_upload_backup(backup)
-        sync_send_notification(
+        # Upload to Telegram in the background
+        enqueue_upload(
+            backup,
             f"✅ <b>Manual Backup Successful</b>\n"
             f"📊 Database: {db_config.name}\n"
             f"📁 File: {backup.filename}\n"
             f"📏 Size: {backup.file_size_str}"
         )
     else:
-        sync_send_notification(
+        enqueue_notification(
             f"❌ <b>Manual Backup Failed</b>\n"
             f"📊 Database: {db_config.name}\n"
             f"⚠️ Error: {backup.error_message}"
@@ -273,17 +426,26 @@ def api_download_backup(backup_id):
     if not filepath.exists():
         return jsonify({'error': 'File not found'}), 404
     
-    return send_file(filepath, as_attachment=True, download_name=backup.filename)
+    return send_file(
+        filepath,
+        as_attachment=True,
+        download_name=backup.filename,
+        conditional=True,
+        etag=True,
+        last_modified=filepath.stat().st_mtime
+    )
 
 @app.route('/api/backup/<int:backup_id>/upload-tg', methods=['POST'])
 @api_auth_required
 def api_upload_to_tg(backup_id):
     backup = BackupHistory.query.get_or_404(backup_id)
-    success = sync_upload_backup(backup)
+    # 已上传过的可凭 file_id 重新发送，否则需要本地文件
+    if not backup.tg_file_id and not (BACKUP_DIR / backup.filename).exists():
+        return jsonify({'error': 'File not found'}), 404
     
-    if success:
-        return jsonify({'success': True})
-    return jsonify({'error': 'Upload failed'}), 500
+    # 后台上传，请求不等待 Telegram
+    enqueue_upload(backup)
+    return jsonify({'success': True, 'queued': True})
 
 @app.route('/api/backup/<int:backup_id>/restore', methods=['POST'])
 @api_auth_required
@@ -316,10 +478,11 @@ def api_delete_backup(backup_id):
 @app.route('/settings')
 @login_required
 def settings():
+    values = Settings.get_many('tg_bot_token', 'tg_chat_ids', 'max_local_backups')
     return render_template('settings.html',
-                         tg_token=Settings.get('tg_bot_token', Config.TG_BOT_TOKEN),
-                         tg_chat_ids=Settings.get('tg_chat_ids', ','.join(Config.TG_CHAT_IDS)),
-                         max_backups=Settings.get('max_local_backups', Config.MAX_LOCAL_BACKUPS),
+                         tg_token=values.get('tg_bot_token', Config.TG_BOT_TOKEN),
+                         tg_chat_ids=values.get('tg_chat_ids', ','.join(Config.TG_CHAT_IDS)),
+                         max_backups=values.get('max_local_backups', Config.MAX_LOCAL_BACKUPS),
                          api_token=API_TOKEN)
 
 @app.route('/api/settings', methods=['POST'])
@@ -328,11 +491,11 @@ def api_update_settings():
     data = request.json
     
     if 'tg_bot_token' in data:
-        Settings.set('tg_bot_token', data['tg_bot_token'])
+        Settings.upsert('tg_bot_token', data['tg_bot_token'])
     if 'tg_chat_ids' in data:
-        Settings.set('tg_chat_ids', data['tg_chat_ids'])
+        Settings.upsert('tg_chat_ids', data['tg_chat_ids'])
     if 'max_local_backups' in data:
-        Settings.set('max_local_backups', data['max_local_backups'])
+        Settings.upsert('max_local_backups', data['max_local_backups'])
     
     log('Settings updated')
     return jsonify({'success': True})
@@ -350,7 +513,7 @@ def api_test_telegram():
 def api_regenerate_token():
     global API_TOKEN
     API_TOKEN = secrets.token_urlsafe(32)
-    Settings.set('api_token', API_TOKEN)
+    Settings.upsert('api_token', API_TOKEN)
     log('API token regenerated')
     return jsonify({'token': API_TOKEN})
 
@@ -359,7 +522,8 @@ def api_regenerate_token():
 @app.route('/logs')
 @login_required
 def logs():
-    page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor', '')
+    before = request.args.get('before', '')
     level = request.args.get('level', '')
     per_page = 50
     
@@ -367,10 +531,9 @@ def logs():
     if level:
         query = query.filter_by(level=level)
     
-    logs = query.order_by(SystemLog.created_at.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
-    return render_template('logs.html', logs=logs, current_level=level)
+    logs, next_cursor, prev_cursor = keyset_page(query, SystemLog, cursor, per_page, before)
+    return render_template('logs.html', logs=logs, current_level=level,
+                         next_cursor=next_cursor, prev_cursor=prev_cursor)
 
 @app.route('/api/logs')
 @api_auth_required
@@ -392,14 +555,15 @@ def api_get_logs():
 def api_change_password():
     data = request.json
     
-    if not check_password_hash(current_user.password_hash, data.get('current_password', '')):
+    if not verify_password(current_user.password_hash, data.get('current_password', '')):
         return jsonify({'error': 'Current password is incorrect'}), 400
     
     if len(data.get('new_password', '')) < 6:
         return jsonify({'error': 'New password must be at least 6 characters'}), 400
     
-    current_user.password_hash = generate_password_hash(data['new_password'])
+    current_user.password_hash = hash_password(data['new_password'])
     db.session.commit()
+    invalidate_user_cache(current_user.id)
     
     log(f'Password changed for user: {current_user.username}')
     return jsonify({'success': True})
@@ -450,6 +614,7 @@ def api_update_bt_panel(id):
         panel.api_key = data['api_key']
     
     db.session.commit()
+    invalidate_bt_panel(panel.id)
     log(f'Updated BT panel config: {panel.name}')
     return jsonify(panel.to_dict())
 
@@ -461,6 +626,7 @@ def api_delete_bt_panel(id):
     
     db.session.delete(panel)
     db.session.commit()
+    invalidate_bt_panel(id)
     
     log(f'Deleted BT panel config: {name}')
     return jsonify({'success': True})
@@ -469,7 +635,7 @@ def api_delete_bt_panel(id):
 @api_auth_required
 def api_test_bt_panel(id):
     panel = BtPanelConfig.query.get_or_404(id)
-    bt = BtPanel(panel.url, panel.api_key)
+    bt = get_bt_panel(panel)
     result = bt.test_connection()
     
     if result.get('status') is not False:
@@ -480,7 +646,7 @@ def api_test_bt_panel(id):
 @api_auth_required
 def api_get_panel_databases(id):
     panel = BtPanelConfig.query.get_or_404(id)
-    bt = BtPanel(panel.url, panel.api_key)
+    bt = get_bt_panel(panel)
     result = bt.get_databases()
     return jsonify(result)
 
@@ -493,11 +659,12 @@ def api_bt_backup(id):
     db_id = data.get('db_id')
     db_name = data.get('db_name', 'unknown')
     push_to_tg = data.get('push_to_tg', True)
+    keep_local = data.get('keep_local', False)
     
     if not db_id:
         return jsonify({'error': 'db_id is required'}), 400
     
-    bt = BtPanel(panel.url, panel.api_key)
+    bt = get_bt_panel(panel)
     
     # 执行备份
     log(f'Starting BT backup for {db_name} (id={db_id}) on {panel.name}')
@@ -547,44 +714,32 @@ def api_bt_backup(id):
             
             # 如果还是没有，用标准路径格式猜测
             if not backup_path:
-                # 获取目录下最新文件
-                backup_dir = f'/www/backup/database/mysql/{db_name}'
-                
+                # 并行查询各引擎备份目录下的最新文件
                 # 等待文件生成，最多等待10分钟（大文件压缩需要时间）
+                # 指数退避轮询：1,2,4,8,16,30,30...秒
                 max_wait = 600  # 10分钟
-                wait_interval = 10  # 每10秒检查一次
+                max_interval = 30
+                delay = 1
                 waited = 0
+                prev_sizes = {}
                 
-                while waited < max_wait:
-                    dir_result = bt._request('/files?action=GetDir', {
-                        'path': backup_dir,
-                        'showRow': 10,
-                        'p': 1,
-                        'sort': 'mtime',
-                        'reverse': 'true'
-                    })
-                    
-                    files_raw = dir_result.get('FILES') or []
-                    for f in files_raw:
-                        if isinstance(f, str):
-                            parts = f.split(';')
-                            fname = parts[0]
-                            if fname.endswith('.sql.zip') or fname.endswith('.sql.gz'):
-                                # 检查文件大小是否还在变化（压缩中）
-                                file_size = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 0
-                                if file_size > 1000:  # 至少1KB
-                                    backup_path = f'{backup_dir}/{fname}'
-                                    log(f'Found backup file: {fname} ({file_size} bytes)')
-                                    break
-                    
-                    if backup_path:
-                        # 再等待几秒确保文件写入完成
-                        time.sleep(3)
-                        break
-                    
-                    log(f'Waiting for backup file... ({waited}s)')
-                    time.sleep(wait_interval)
-                    waited += wait_interval
+                with ThreadPoolExecutor(max_workers=len(BT_BACKUP_ENGINES)) as executor:
+                    while waited < max_wait:
+                        for candidate, file_size in find_bt_backup_files(bt, db_name, executor):
+                            # 连续两次大小一致才认为压缩完成
+                            if file_size > 1000 and prev_sizes.get(candidate) == file_size:  # 至少1KB
+                                backup_path = candidate
+                                log(f'Found backup file: {candidate} ({file_size} bytes)')
+                                break
+                            prev_sizes[candidate] = file_size
+                        
+                        if backup_path:
+                            break
+                        
+                        log(f'Waiting for backup file... ({waited}s)')
+                        time.sleep(delay)
+                        waited += delay
+                        delay = min(delay * 2, max_interval)
             if backup_path:
                 log(f'Found backup: {backup_path}')
                 
@@ -595,147 +750,46 @@ def api_bt_backup(id):
                 downloaded = bt.download_backup(backup_path, str(save_path))
                 
                 if downloaded and save_path.exists() and save_path.stat().st_size > 100:
-                    from backup import calculate_hash
-                    
-                    backup_record = BackupHistory(
-                        database_id=None,
-                        filename=local_filename,
-                        file_size=save_path.stat().st_size,
-                        file_hash=calculate_hash(save_path),
-                        status='success',
-                        duration=0
-                    )
-                    db.session.add(backup_record)
-                    db.session.commit()
-                    
-                    # 上传到Telegram
-                    log(f'Uploading to Telegram: {local_filename} ({save_path.stat().st_size} bytes)')
-                    sync_upload_backup(backup_record)
-                    backup_file = backup_record.to_dict()
-                    
-                    log(f'Backup uploaded to TG: {local_filename}')
-                    
-                    # 删除本地备份文件
-                    try:
-                        save_path.unlink()
-                        log(f'Deleted local backup: {local_filename}')
-                    except Exception as e:
-                        log(f'Failed to delete local backup: {e}', 'warning')
-                else:
-                    # 下载失败，尝试在服务器上直接执行curl推送到Telegram
-                    log(f'Download failed, trying server-side push...')
-                    
-                    bot_token = Settings.get('tg_bot_token', '')
-                    chat_ids = Settings.get('tg_chat_ids', '')
-                    
-                    if bot_token and chat_ids:
-                        chat_id = chat_ids.split(',')[0].strip()
-                        
-                        # URL编码的caption
-                        import urllib.parse
-                        caption = f"🗄️ Database Backup\n📊 DB: {db_name}\n📁 File: {local_filename}\n🖥️ Panel: {panel.name}"
-                        
-                        # curl命令，加超时设置（2小时，支持大文件上传）
-                        curl_cmd = f'curl -s --max-time 7200 -X POST "https://api.telegram.org/bot{bot_token}/sendDocument" -F chat_id="{chat_id}" -F document=@"{backup_path}" -F caption="{caption}"'
+                    if keep_local:
+                        # 保留本地副本：记录备份历史，哈希在后台任务中计算
+                        backup_record = BackupHistory(
+                            database_id=None,
+                            filename=local_filename,
+                            file_size=save_path.stat().st_size,
+                            file_hash=None,
+                            status='success',
+                            duration=0
+                        )
+                        db.session.add(backup_record)
+                        db.session.commit()
                         
-                        # 尝试通过计划任务执行（这是最可靠的方式）
-                        import time as t
-                        task_name = f'tg_push_{int(t.time())}'
-                        
-                        # 创建一次性计划任务
-                        create_result = bt._request('/crontab?action=AddCrontab', {
-                            'name': task_name,
-                            'type': 'minute-n',
-                            'where1': '1',
-                            'hour': '',
-                            'minute': '',
-                            'week': '',
-                            'sType': 'toShell',
-                            'sBody': curl_cmd,
-                            'sName': '',
-                            'backupTo': '',
-                            'save': '',
-                            'urladdress': ''
-                        })
-                        log(f'Create crontab result: {create_result}')
-                        
-                        if create_result.get('status'):
-                            # 获取任务ID并立即执行
-                            cron_id = create_result.get('id')
-                            if cron_id:
-                                exec_result = bt._request('/crontab?action=StartTask', {
-                                    'id': cron_id
-                                })
-                                log(f'Execute crontab result: {exec_result}')
-                                
-                                # 等待执行完成
-                                t.sleep(3)
-                                
-                                # 删除计划任务
-                                del_result = bt._request('/crontab?action=DelCrontab', {
-                                    'id': cron_id
-                                })
-                                log(f'Delete crontab result: {del_result}')
-                                
-                                # 保存备份记录
-                                backup_record = BackupHistory(
-                                    database_id=None,
-                                    filename=local_filename,
-                                    file_size=0,
-                                    file_hash='',
-                                    status='success',
-                                    duration=0,
-                                    tg_uploaded=True
-                                )
-                                db.session.add(backup_record)
-                                db.session.commit()
-                                log(f'Backup record saved: {local_filename}')
+                        log(f'Queued Telegram upload: {local_filename} ({backup_record.file_size} bytes)')
+                        enqueue_upload(backup_record)
+                        backup_file = backup_record.to_dict()
                     else:
-                        log(f'Telegram not configured', 'warning')
-                
-                # 删除宝塔服务器上的备份文件
-                delete_result = bt._request('/files?action=DeleteFile', {
-                    'path': backup_path
-                })
-                log(f'Delete remote result: {delete_result}')
-                
-                # 删除宝塔的数据库备份记录
-                # 先获取备份列表找到对应的记录ID
-                backup_list = bt._request('/database?action=GetBackupList', {
-                    'p': 1,
-                    'limit': 20,
-                    'type': 0,
-                    'tojs': '',
-                    'table': 'backup',
-                    'search': db_name
-                })
-                if backup_list.get('data'):
-                    for bk in backup_list['data']:
-                        bk_filename = bk.get('filename', '')
-                        if local_filename in bk_filename or bk_filename in backup_path:
-                            bk_id = bk.get('id')
-                            if bk_id:
-                                del_bk_result = bt._request('/database?action=DeleteBackup', {
-                                    'id': bk_id
-                                })
-                                log(f'Delete BT backup record result: {del_bk_result}')
-                                break
-                
-                # 清空回收站
-                recycle_result = bt._request('/files?action=Close_Recycle_bin', {
-                    'status': 1
-                })
-                if not recycle_result.get('status'):
-                    # 尝试另一种方式清空回收站
-                    recycle_result = bt._request('/files?action=Re_Recycle_bin', {
-                        'path': 'all'
-                    })
-                log(f'Clear recycle bin result: {recycle_result}')
+                        # 仅推送：不计算哈希、不写备份记录，上传后删除本地文件
+                        log(f'Queued Telegram push: {local_filename} ({save_path.stat().st_size} bytes)')
+                        enqueue_file_upload(local_filename)
+                    
+                    # 删除宝塔服务器上的备份文件
+                    cleanup_remote_backup(bt, db_name, backup_path, local_filename)
+                else:
+                    # 下载失败，后台在服务器上直接执行curl推送到Telegram，完成后清理远程文件
+                    log(f'Download failed, queued server-side push...')
+                    scheduler.add_job(
+                        bt_remote_push_job,
+                        'date',
+                        args=[panel.id, db_name, backup_path],
+                        id=f'bt_push_{panel.id}_{local_filename}',
+                        name=f'BT Push: {local_filename}',
+                        misfire_grace_time=3600,
+                        replace_existing=True
+                    )
             else:
                 log(f'Could not find backup file path', 'warning')
         
         # 发送通知
-        sync_send_notification(
+        enqueue_notification(
             f"✅ <b>宝塔备份成功</b>\n"
             f"📊 数据库: {db_name}\n"
             f"🖥️ 面板: {panel.name}"
@@ -750,7 +804,7 @@ def api_bt_backup(id):
         error_msg = result.get('msg', 'Backup failed')
         log(f'BT backup failed for {db_name}: {error_msg}', 'error')
         
-        sync_send_notification(
+        enqueue_notification(
             f"❌ <b>宝塔备份失败</b>\n"
             f"📊 数据库: {db_name}\n"
             f"⚠️ 错误: {error_msg}"
@@ -837,10 +891,201 @@ def api_delete_bt_database(id):
     return jsonify({'success': True})
 
 
+def find_bt_backup_files(bt: BtPanel, db_name: str, executor: ThreadPoolExecutor) -> list:
+    """并行查询各引擎的备份目录，返回每个目录下最新的备份文件 [(path, size)]"""
+    def probe(backup_dir):
+        return backup_dir, bt._request('/files?action=GetDir', {
+            'path': backup_dir,
+            'showRow': 10,
+            'p': 1,
+            'sort': 'mtime',
+            'reverse': 'true'
+        })
+    
+    backup_dirs = [f'/www/backup/database/{engine}/{db_name}' for engine in BT_BACKUP_ENGINES]
+    found = []
+    for backup_dir, dir_result in executor.map(probe, backup_dirs):
+        for f in dir_result.get('FILES') or []:
+            if isinstance(f, str):
+                fname, _, rest = f.partition(';')
+                if fname.endswith(BT_BACKUP_SUFFIXES):
+                    size_str = rest.partition(';')[0]
+                    found.append((f'{backup_dir}/{fname}', int(size_str) if size_str.isdigit() else 0))
+                    break
+    return found
+
+
+def push_remote_backup(bt: BtPanel, db_name: str, backup_path: str, caption: str, prefix: str = '') -> bool:
+    """通过宝塔计划任务在面板服务器上执行curl，将备份文件推送到Telegram，上传成功后由同一脚本删除文件
+    返回 True 时宝塔备份记录的清理已随计划任务的删除一起延后执行，调用方不要再清理
+    """
+    values = Settings.get_many('tg_bot_token', 'tg_chat_ids')
+    bot_token = values.get('tg_bot_token') or ''
+    chat_ids = values.get('tg_chat_ids') or ''
+    
+    if not (bot_token and chat_ids):
+        log(f'{prefix}Telegram not configured', 'warning')
+        return False
+    
+    chat_id = chat_ids.split(',')[0].strip()
+    local_filename = Path(backup_path).name
+    
+    # curl命令，加超时设置（2小时，支持大文件上传）；上传成功后直接删除，失败则保留文件
+    curl_cmd = f'curl -sf --max-time 7200 -X POST "https://api.telegram.org/bot{bot_token}/sendDocument" -F chat_id="{chat_id}" -F document=@"{backup_path}" -F caption="{caption}" && rm -f "{backup_path}"'
+    
+    # 通过计划任务执行（这是最可靠的方式）
+    task_name = f'tg_push_{int(time.time())}'
+    
+    # 创建一次性计划任务
+    create_result = bt._request('/crontab?action=AddCrontab', {
+        'name': task_name,
+        'type': 'minute-n',
+        'where1': '1',
+        'hour': '',
+        'minute': '',
+        'week': '',
+        'sType': 'toShell',
+        'sBody': curl_cmd,
+        'sName': '',
+        'backupTo': '',
+        'save': '',
+        'urladdress': ''
+    })
+    log(f'{prefix}Create crontab result: {create_result}')
+    
+    cron_id = create_result.get('id') if create_result.get('status') else None
+    if not cron_id:
+        return False
+    
+    # 立即执行计划任务
+    exec_result = bt._request('/crontab?action=StartTask', {
+        'id': cron_id
+    })
+    log(f'{prefix}Execute crontab result: {exec_result}')
+    
+    # StartTask 只是排队执行脚本：等 curl 打开文件后再删除计划任务和宝塔备份记录，
+    # 交给一次性定时任务延后执行，不占用当前线程等待
+    scheduler.add_job(
+        finish_remote_push, 'date',
+        run_date=datetime.now() + timedelta(seconds=BT_CRONTAB_GRACE),
+        args=[bt, cron_id, db_name, backup_path, prefix],
+        id=f'bt_delcron_{cron_id}',
+        misfire_grace_time=3600,
+        replace_existing=True
+    )
+    
+    # 保存备份记录
+    backup_record = BackupHistory(
+        database_id=None,
+        filename=local_filename,
+        file_size=0,
+        file_hash='',
+        status='success',
+        duration=0,
+        tg_uploaded=True
+    )
+    db.session.add(backup_record)
+    db.session.commit()
+    log(f'{prefix}Backup record saved: {local_filename}')
+    return True
+
+
+def finish_remote_push(bt: BtPanel, cron_id, db_name: str, backup_path: str, prefix: str = ''):
+    """推送脚本启动后：删除一次性宝塔计划任务，再清理备份记录（文件由脚本上传成功后自行删除）"""
+    with app.app_context():
+        del_result = bt._request('/crontab?action=DelCrontab', {
+            'id': cron_id
+        })
+        log(f'{prefix}Delete crontab result: {del_result}')
+        cleanup_remote_backup(bt, db_name, backup_path, Path(backup_path).name, prefix, remove_file=False)
+
+
+def cleanup_remote_backup(bt: BtPanel, db_name: str, backup_path: str, local_filename: str, prefix: str = '',
+                          remove_file: bool = True):
+    """删除宝塔服务器上的备份文件、备份记录并清空回收站
+    remove_file=False 表示文件已由推送脚本删除，只清理记录
+    """
+    if remove_file:
+        delete_result = bt._request('/files?action=DeleteFile', {
+            'path': backup_path
+        })
+        log(f'{prefix}Delete remote result: {delete_result}')
+    
+    # 删除宝塔的数据库备份记录
+    # 先获取备份列表找到对应的记录ID
+    backup_list = bt._request('/database?action=GetBackupList', {
+        'p': 1,
+        'limit': 20,
+        'type': 0,
+        'tojs': '',
+        'table': 'backup',
+        'search': db_name
+    })
+    if backup_list.get('data'):
+        for bk in backup_list['data']:
+            bk_filename = bk.get('filename', '')
+            if local_filename in bk_filename or bk_filename in backup_path:
+                bk_id = bk.get('id')
+                if bk_id:
+                    del_bk_result = bt._request('/database?action=DeleteBackup', {
+                        'id': bk_id
+                    })
+                    log(f'{prefix}Delete BT backup record result: {del_bk_result}')
+                    break
+    
+    # 清空回收站；本次用 DeleteFile 移入了文件时必须清空，否则近期清空过可跳过
+    recycle_result = bt.clear_recycle_bin(force=remove_file)
+    log(f'{prefix}Clear recycle bin result: {recycle_result}')
+
+
+def bt_remote_push_job(panel_id: int, db_name: str, backup_path: str):
+    """后台执行服务器端推送，完成后清理远程备份"""
+    with app.app_context():
+        panel = db.session.get(BtPanelConfig, panel_id)
+        if not panel:
+            return
+        
+        bt = get_bt_panel(panel)
+        local_filename = Path(backup_path).name
+        caption = f"🗄️ Database Backup\n📊 DB: {db_name}\n📁 File: {local_filename}\n🖥️ Panel: {panel.name}"
+        
+        if not push_remote_backup(bt, db_name, backup_path, caption):
+            cleanup_remote_backup(bt, db_name, backup_path, local_filename)
+
+
+def acquire_bt_lock(config_id: int):
+    """写入进行中标记并返回其时间；标记已存在且未超时（上一次备份仍在运行）时返回 None"""
+    started_at = datetime.utcnow()
+    for _ in range(2):
+        db.session.add(BtBackupLock(config_id=config_id, started_at=started_at))
+        try:
+            db.session.commit()
+            return started_at
+        except IntegrityError:
+            db.session.rollback()
+        
+        # 超时的标记来自异常中断或释放失败的任务，删除后接管
+        stale = BtBackupLock.query.filter(
+            BtBackupLock.config_id == config_id,
+            BtBackupLock.started_at < started_at - timedelta(seconds=BT_LOCK_TTL)
+        ).delete()
+        db.session.commit()
+        if not stale:
+            return None
+    return None
+
+
+def release_bt_lock(config_id: int, started_at: datetime):
+    """清除本次任务写入的进行中标记（已被接管的标记不动）"""
+    db.session.rollback()
+    BtBackupLock.query.filter_by(config_id=config_id, started_at=started_at).delete()
+    db.session.commit()
+
+
 def bt_backup_job(config_id: int):
     """宝塔定时备份任务"""
     with app.app_context():
-        config = BtDatabaseConfig.query.get(config_id)
+        config = db.session.get(BtDatabaseConfig, config_id, options=[joinedload(BtDatabaseConfig.panel)])
         if not config or not config.enabled:
             return
         
@@ -848,174 +1093,80 @@ def bt_backup_job(config_id: int):
         if not panel or not panel.enabled:
             return
         
-        bt = BtPanel(panel.url, panel.api_key)
-        db_name = config.db_name
-        
-        log(f'[Scheduled] Starting BT backup for {db_name}')
-        result = bt.backup_database(config.bt_db_id)
+        # 上一次备份仍在进行时跳过，避免重复备份和重复推送
+        lock = acquire_bt_lock(config_id)
+        if lock is None:
+            log(f'[Scheduled] BT backup for {config.db_name} still running, skipped', 'warning')
+            return
         
-        if result.get('status'):
-            log(f'[Scheduled] BT backup completed for {db_name}')
+        try:
+            bt = get_bt_panel(panel)
+            db_name = config.db_name
             
-            # 如果需要推送到TG
-            if config.push_to_tg:
-                import time as t
-                t.sleep(1)
-                
-                backup_path = None
-                
-                # 从返回结果获取
-                msg = result.get('msg', '')
-                if '/www/backup' in str(msg):
-                    backup_path = msg
+            log(f'[Scheduled] Starting BT backup for {db_name}')
+            result = bt.backup_database(config.bt_db_id)
+            
+            if result.get('status'):
+                log(f'[Scheduled] BT backup completed for {db_name}')
                 
-                # 查询备份列表
-                if not backup_path:
-                    backup_dir = f'/www/backup/database/mysql/{db_name}'
-                    dir_result = bt._request('/files?action=GetDir', {
-                        'path': backup_dir,
-                        'showRow': 10,
-                        'p': 1
-                    })
+                # 如果需要推送到TG
+                if config.push_to_tg:
+                    import time as t
+                    t.sleep(1)
                     
-                    files_raw = dir_result.get('FILES') or []
-                    for f in files_raw:
-                        if isinstance(f, str):
-                            parts = f.split(';')
-                            fname = parts[0]
-                            if fname.endswith('.sql.zip') or fname.endswith('.sql.gz'):
-                                backup_path = f'{backup_dir}/{fname}'
-                                break
-                
-                if backup_path:
-                    local_filename = Path(backup_path).name
-                    log(f'[Scheduled] Found backup: {backup_path}')
+                    backup_path = None
                     
-                    # 获取TG配置
-                    bot_token = Settings.get('tg_bot_token', '')
-                    chat_ids = Settings.get('tg_chat_ids', '')
+                    # 从返回结果获取
+                    msg = result.get('msg', '')
+                    if '/www/backup' in str(msg):
+                        backup_path = msg
                     
-                    if bot_token and chat_ids:
-                        chat_id = chat_ids.split(',')[0].strip()
+                    # 查询备份列表
+                    if not backup_path:
+                        with ThreadPoolExecutor(max_workers=len(BT_BACKUP_ENGINES)) as executor:
+                            found = find_bt_backup_files(bt, db_name, executor)
+                        if found:
+                            backup_path = found[0][0]
+                    
+                    if backup_path:
+                        local_filename = Path(backup_path).name
+                        log(f'[Scheduled] Found backup: {backup_path}')
                         
                         caption = f"🗄️ Database Backup (Scheduled)\n📊 DB: {db_name}\n📁 File: {local_filename}\n🖥️ Panel: {panel.name}"
-                        
-                        # curl命令，加超时设置（2小时，支持大文件）
-                        curl_cmd = f'curl -s --max-time 7200 -X POST "https://api.telegram.org/bot{bot_token}/sendDocument" -F chat_id="{chat_id}" -F document=@"{backup_path}" -F caption="{caption}"'
-                        
-                        task_name = f'tg_scheduled_{int(t.time())}'
-                        
-                        # 创建一次性计划任务
-                        create_result = bt._request('/crontab?action=AddCrontab', {
-                            'name': task_name,
-                            'type': 'minute-n',
-                            'where1': '1',
-                            'hour': '',
-                            'minute': '',
-                            'week': '',
-                            'sType': 'toShell',
-                            'sBody': curl_cmd,
-                            'sName': '',
-                            'backupTo': '',
-                            'save': '',
-                            'urladdress': ''
-                        })
-                        log(f'[Scheduled] Create crontab result: {create_result}')
-                        
-                        if create_result.get('status'):
-                            cron_id = create_result.get('id')
-                            if cron_id:
-                                # 执行计划任务
-                                exec_result = bt._request('/crontab?action=StartTask', {
-                                    'id': cron_id
-                                })
-                                log(f'[Scheduled] Execute crontab result: {exec_result}')
-                                
-                                # 等待执行完成
-                                t.sleep(5)
-                                
-                                # 删除计划任务
-                                del_result = bt._request('/crontab?action=DelCrontab', {
-                                    'id': cron_id
-                                })
-                                log(f'[Scheduled] Delete crontab result: {del_result}')
-                                
-                                # 保存备份记录
-                                backup_record = BackupHistory(
-                                    database_id=None,
-                                    filename=local_filename,
-                                    file_size=0,
-                                    file_hash='',
-                                    status='success',
-                                    duration=0,
-                                    tg_uploaded=True
-                                )
-                                db.session.add(backup_record)
-                                db.session.commit()
-                                log(f'[Scheduled] Backup record saved: {local_filename}')
-                    
-                    # 删除备份文件
-                    delete_result = bt._request('/files?action=DeleteFile', {
-                        'path': backup_path
-                    })
-                    log(f'[Scheduled] Delete file result: {delete_result}')
-                    
-                    # 删除宝塔的数据库备份记录
-                    backup_list = bt._request('/database?action=GetBackupList', {
-                        'p': 1,
-                        'limit': 20,
-                        'type': 0,
-                        'tojs': '',
-                        'table': 'backup',
-                        'search': db_name
-                    })
-                    if backup_list.get('data'):
-                        for bk in backup_list['data']:
-                            bk_filename = bk.get('filename', '')
-                            if local_filename in bk_filename or bk_filename in backup_path:
-                                bk_id = bk.get('id')
-                                if bk_id:
-                                    del_bk_result = bt._request('/database?action=DeleteBackup', {
-                                        'id': bk_id
-                                    })
-                                    log(f'[Scheduled] Delete BT backup record result: {del_bk_result}')
-                                    break
-                    
-                    # 清空回收站
-                    recycle_result = bt._request('/files?action=Close_Recycle_bin', {
-                        'status': 1
-                    })
-                    if not recycle_result.get('status'):
-                        recycle_result = bt._request('/files?action=Re_Recycle_bin', {
-                            'path': 'all'
-                        })
-                    log(f'[Scheduled] Clear recycle bin result: {recycle_result}')
-            
-            sync_send_notification(
-                f"✅ <b>定时备份成功</b>\n"
-                f"📊 数据库: {db_name}\n"
-                f"🖥️ 面板: {panel.name}"
-            )
-        else:
-            error_msg = result.get('msg', 'Backup failed')
-            log(f'[Scheduled] BT backup failed for {db_name}: {error_msg}', 'error')
-            sync_send_notification(
-                f"❌ <b>定时备份失败</b>\n"
-                f"📊 数据库: {db_name}\n"
-                f"⚠️ 错误: {error_msg}"
-            )
-
-
-def update_bt_job(config: BtDatabaseConfig):
-    """更新宝塔备份定时任务"""
+                        if not push_remote_backup(bt, db_name, backup_path, caption, prefix='[Scheduled] '):
+                            cleanup_remote_backup(bt, db_name, backup_path, local_filename, prefix='[Scheduled] ')
+                
+                sync_send_notification(
+                    f"✅ <b>定时备份成功</b>\n"
+                    f"📊 数据库: {db_name}\n"
+                    f"🖥️ 面板: {panel.name}"
+                )
+            else:
+                error_msg = result.get('msg', 'Backup failed')
+                log(f'[Scheduled] BT backup failed for {db_name}: {error_msg}', 'error')
+                sync_send_notification(
+                    f"❌ <b>定时备份失败</b>\n"
+                    f"📊 数据库: {db_name}\n"
+                    f"⚠️ 错误: {error_msg}"
+                )
+        finally:
+            release_bt_lock(config_id, lock)
+
+
+def update_bt_job(config: BtDatabaseConfig, existing_ids: set = None):
+    """更新宝塔备份定时任务
+    existing_ids: 批量注册时预先取好的任务ID集合，避免逐个 get_job
+    """
     from apscheduler.triggers.cron import CronTrigger
     from apscheduler.triggers.interval import IntervalTrigger
     
     job_id = f'bt_backup_{config.id}'
     
     # 移除已有任务
-    if scheduler.get_job(job_id):
+    exists = job_id in existing_ids if existing_ids is not None else scheduler.get_job(job_id)
+    if exists:
         scheduler.remove_job(job_id)
+    cache.delete(JOBS_CACHE_KEY)
     
     # 添加新任务
     if config.enabled and config.schedule_enabled:
@@ -1044,6 +1195,9 @@ def update_bt_job(config: BtDatabaseConfig):
             args=[config.id],
             id=job_id,
             name=f'BT Backup: {config.db_name}',
+            max_instances=1,
+            coalesce=True,
+            misfire_grace_time=600,
             replace_existing=True
         )
         log(f'Scheduled BT backup for {config.db_name}: {schedule_desc}')
@@ -1054,6 +1208,7 @@ def remove_bt_job(config_id: int):
     job_id = f'bt_backup_{config_id}'
     if scheduler.get_job(job_id):
         scheduler.remove_job(job_id)
+    cache.delete(JOBS_CACHE_KEY)
 
 @app.route('/api/bt-panels/<int:id>/download', methods=['POST'])
 @api_auth_required  
@@ -1066,7 +1221,7 @@ def api_bt_download_backup(id):
     if not filename:
         return jsonify({'error': 'filename is required'}), 400
     
-    bt = BtPanel(panel.url, panel.api_key)
+    bt = get_bt_panel(panel)
     
     # 本地保存路径
     local_filename = Path(filename).name
@@ -1076,22 +1231,20 @@ def api_bt_download_backup(id):
     success = bt.download_backup(filename, str(save_path))
     
     if success and save_path.exists():
-        # 创建备份记录
-        from backup import calculate_hash
-        
+        # 创建备份记录，哈希在后台任务中计算
         backup = BackupHistory(
             database_id=None,  # 宝塔备份不关联本地数据库配置
             filename=local_filename,
             file_size=save_path.stat().st_size,
-            file_hash=calculate_hash(save_path),
+            file_hash=None,
             status='success',
             duration=0
         )
         db.session.add(backup)
         db.session.commit()
         
-        # 上传到Telegram
-        sync_upload_backup(backup)
+        # 后台上传到Telegram
+        enqueue_upload(backup)
         
         log(f'Downloaded and uploaded backup: {local_filename}')
         return jsonify({'success': True, 'backup': backup.to_dict()})
@@ -1103,8 +1256,18 @@ def init_bt_schedules():
     """加载宝塔定时备份任务"""
     with app.app_context():
         bt_configs = BtDatabaseConfig.query.filter_by(enabled=True, schedule_enabled=True).all()
-        for config in bt_configs:
-            update_bt_job(config)
+        existing_ids = {job.id for job in scheduler.get_jobs()}
+        
+        # 批量注册期间暂停调度，避免每次 add_job 都唤醒调度线程
+        paused = scheduler.running
+        if paused:
+            scheduler.pause()
+        try:
+            for config in bt_configs:
+                update_bt_job(config, existing_ids)
+        finally:
+            if paused:
+                scheduler.resume()
         if bt_configs:
             print(f'[INFO] Loaded {len(bt_configs)} BT backup schedules')
 
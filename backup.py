@@ -1,24 +1,140 @@
 import os
 import gzip
+import atexit
 import hashlib
+import io
+import mmap
+import queue
+import shutil
+import tempfile
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from itertools import islice
 from pathlib import Path
 from config import BACKUP_DIR, Config
 from models import db, DatabaseConfig, BackupHistory, SystemLog
 
+try:
+    import blake3
+except ImportError:
+    blake3 = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    from isal import igzip
+except ImportError:
+    igzip = None
+
+LOG_BATCH_SIZE = 50
+LOG_FLUSH_INTERVAL = 0.2  # seconds
+
+_log_queue = queue.SimpleQueue()
+_log_writer = None
+
 def log(message: str, level: str = 'info', details: str = None):
-    entry = SystemLog(level=level, message=message, details=details)
-    db.session.add(entry)
-    db.session.commit()
+    if _log_writer is None:
+        entry = SystemLog(level=level, message=message, details=details)
+        db.session.add(entry)
+        db.session.commit()
+    else:
+        _log_queue.put({
+            'level': level,
+            'message': message,
+            'details': details,
+            'created_at': datetime.utcnow()
+        })
     print(f'[{level.upper()}] {message}')
 
+def _write_logs(app, rows: list):
+    """Insert a batch of log rows in a single transaction"""
+    with app.app_context():
+        try:
+            db.session.execute(SystemLog.__table__.insert(), rows)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f'[ERROR] Failed to write {len(rows)} log entries: {e}')
+        finally:
+            db.session.remove()
+
+def _log_writer_loop(app):
+    while True:
+        rows = [_log_queue.get()]
+        deadline = time.monotonic() + LOG_FLUSH_INTERVAL
+        while len(rows) < LOG_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                rows.append(_log_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        _write_logs(app, rows)
+
+def flush_logs(app):
+    """Write out any queued log entries synchronously"""
+    rows = []
+    while True:
+        try:
+            rows.append(_log_queue.get_nowait())
+        except queue.Empty:
+            break
+    if rows:
+        _write_logs(app, rows)
+
+def start_log_writer(app):
+    """Batch log inserts on a background thread instead of one commit per call"""
+    global _log_writer
+    if _log_writer is not None:
+        return
+    _log_writer = threading.Thread(target=_log_writer_loop, args=(app,), name='log-writer', daemon=True)
+    _log_writer.start()
+    atexit.register(flush_logs, app)
+
+HASH_BUFFER_SIZE = 1 << 20  # 1 MiB
+HASH_MMAP_THRESHOLD = 64 << 20  # mmap files larger than 64 MiB
+GZIP_LEVEL = 1  # SQL dumps still compress well at the fastest level
+ZSTD_LEVEL = 3
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+DUMP_BATCH_ROWS = 500  # rows per multi-row INSERT
+DUMP_WORKERS = 4  # tables dumped concurrently, one connection each
+RESTORE_BATCH_STATEMENTS = 100  # statements per round-trip on restore
+MYSQL_LOCK_WAIT_TIMEOUT = 5  # seconds FLUSH TABLES WITH READ LOCK may wait before a parallel dump goes serial
+
 def calculate_hash(filepath: Path) -> str:
-    sha256 = hashlib.sha256()
-    with open(filepath, 'rb') as f:
-        for chunk in iter(lambda: f.read(8192), b''):
-            sha256.update(chunk)
-    return sha256.hexdigest()
+    """File fingerprint: 'blake3:<hex>' when blake3 is installed, bare SHA-256 hex otherwise.
+
+    SHA-256 hashes are stored without a prefix so existing records stay comparable.
+    """
+    if blake3:
+        # mmap + multithreaded hashing inside the Rust extension, GIL released
+        hasher = blake3.blake3(max_threads=blake3.blake3.AUTO)
+        return 'blake3:' + hasher.update_mmap(str(filepath)).hexdigest()
+    
+    with open(filepath, 'rb', buffering=0) as f:
+        if os.fstat(f.fileno()).st_size > HASH_MMAP_THRESHOLD:
+            # Hash straight from the page cache, no copy into a Python buffer
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if hasattr(mmap, 'MADV_SEQUENTIAL'):
+                    mm.madvise(mmap.MADV_SEQUENTIAL)
+                return hashlib.sha256(mm).hexdigest()
+        
+        if hasattr(hashlib, 'file_digest'):  # Python 3.11+
+            return hashlib.file_digest(f, hashlib.sha256).hexdigest()
+        
+        hasher = hashlib.sha256()
+        buf = bytearray(HASH_BUFFER_SIZE)
+        view = memoryview(buf)
+        while n := f.readinto(buf):
+            hasher.update(view[:n])
+        return hasher.hexdigest()
+
 
 def cleanup_old_backups(db_config: DatabaseConfig):
     """Remove old backups keeping only MAX_LOCAL_BACKUPS"""
@@ -36,175 +152,337 @@ def cleanup_old_backups(db_config: DatabaseConfig):
         db.session.commit()
 
 
-def dump_mysql(db_config: DatabaseConfig, output_path: Path):
-    """使用 pymysql 导出 MySQL 数据库"""
+def dump_suffix() -> str:
+    """Backup file suffix for the best available compressor"""
+    return '.sql.zst' if zstandard else '.sql.gz'
+
+
+class HashingWriter(io.RawIOBase):
+    """Binary tee: hashes every compressed byte on its way to the underlying file.
+
+    Produces the same digest format as calculate_hash, without re-reading the file.
+    """
+    
+    def __init__(self, raw):
+        self.raw = raw
+        self.hasher = blake3.blake3() if blake3 else hashlib.sha256()
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, b) -> int:
+        self.hasher.update(b)
+        return self.raw.write(b)
+    
+    def flush(self):
+        self.raw.flush()
+    
+    def hexdigest(self) -> str:
+        digest = self.hasher.hexdigest()
+        return 'blake3:' + digest if blake3 else digest
+
+
+def open_dump(path: Path, mode: str = 'r', fileobj=None):
+    """Open a compressed dump as UTF-8 text for writing ('w') or reading ('r').
+
+    Writes zstd for .zst paths and gzip otherwise (ISA-L igzip when installed);
+    compressed bytes go to fileobj if given (left open), else to path.
+    Reads detect the format from the magic bytes, so older .sql.gz backups still restore.
+    """
+    if mode == 'w':
+        if path.suffix == '.zst':
+            cctx = zstandard.ZstdCompressor(level=ZSTD_LEVEL, threads=-1)
+            writer = cctx.stream_writer(fileobj or open(path, 'wb'), closefd=fileobj is None)
+            return io.TextIOWrapper(writer, encoding='utf-8')
+        return (igzip or gzip).open(fileobj or path, 'wt', encoding='utf-8', compresslevel=GZIP_LEVEL)
+    
+    with open(path, 'rb') as fh:
+        magic = fh.read(4)
+    if magic == ZSTD_MAGIC:
+        if not zstandard:
+            raise RuntimeError('zstandard is required to restore .zst backups')
+        reader = zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'))
+        return io.TextIOWrapper(reader, encoding='utf-8')
+    return (igzip or gzip).open(path, 'rt', encoding='utf-8')
+
+
+def _batches(rows, size: int = DUMP_BATCH_ROWS):
+    """Yield lists of up to size rows from a cursor without buffering it"""
+    it = iter(rows)
+    while batch := list(islice(it, size)):
+        yield batch
+
+
+def _dump_tables_parallel(tables: list, connect, dump_table, f, workers: int = DUMP_WORKERS):
+    """Dump tables on worker threads (one connection per worker) and write them to f in table order"""
+    local = threading.local()
+    conns = []
+    conns_lock = threading.Lock()
+    
+    def worker(table):
+        conn = getattr(local, 'conn', None)
+        if conn is None:
+            conn = local.conn = connect()
+            with conns_lock:
+                conns.append(conn)
+        # 每表先写入临时文件（真正的文本文件，copy_expert 需要 TextIOBase）
+        out = tempfile.TemporaryFile(mode='w+', encoding='utf-8', dir=BACKUP_DIR)
+        dump_table(conn, table, out)
+        out.seek(0)
+        return out
+    
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for out in executor.map(worker, tables):
+                with out:
+                    shutil.copyfileobj(out, f)
+    finally:
+        for conn in conns:
+            conn.close()
+
+
+def _mysql_formatters(description) -> list:
+    """按列类型预先选好每列的取值格式化函数，行循环中不再逐值判断类型"""
+    from pymysql.constants import FIELD_TYPE
+    from pymysql.converters import escape_string
+    
+    numeric_types = {
+        FIELD_TYPE.TINY, FIELD_TYPE.SHORT, FIELD_TYPE.LONG, FIELD_TYPE.INT24,
+        FIELD_TYPE.LONGLONG, FIELD_TYPE.YEAR, FIELD_TYPE.FLOAT, FIELD_TYPE.DOUBLE,
+        FIELD_TYPE.DECIMAL, FIELD_TYPE.NEWDECIMAL,
+    }
+    datetime_types = {FIELD_TYPE.DATETIME, FIELD_TYPE.TIMESTAMP}
+    
+    def fmt_number(val):
+        return 'NULL' if val is None else str(val)
+    
+    def fmt_text(val):
+        # 字符串/BLOB 列按字符集可能返回 str 或 bytes
+        if val is None:
+            return 'NULL'
+        if isinstance(val, bytes):
+            return f"X'{val.hex()}'"
+        return "'" + escape_string(str(val)) + "'"
+    
+    def fmt_datetime(val):
+        if isinstance(val, datetime):
+            return f"'{val.isoformat(sep=' ', timespec='seconds')}'"
+        return fmt_text(val)  # NULL 或零值日期（pymysql 返回 str）
+    
+    formatters = []
+    for desc in description:
+        if desc[1] in numeric_types:
+            formatters.append(fmt_number)
+        elif desc[1] in datetime_types:
+            formatters.append(fmt_datetime)
+        else:
+            formatters.append(fmt_text)
+    return formatters
+
+
+def _dump_mysql_table(conn, table: str, f):
+    """导出单个 MySQL 表的结构和数据"""
     import pymysql
     
-    conn = pymysql.connect(
-        host=db_config.host,
-        port=db_config.port or 3306,
-        user=db_config.username,
-        password=db_config.password,
-        database=db_config.database,
-        charset='utf8mb4'
-    )
+    f.write(f"-- ----------------------------\n")
+    f.write(f"-- Table structure for {table}\n")
+    f.write(f"-- ----------------------------\n")
+    f.write(f"DROP TABLE IF EXISTS `{table}`;\n")
     
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(f"-- MySQL Dump\n")
-        f.write(f"-- Database: {db_config.database}\n")
-        f.write(f"-- Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-        f.write("SET NAMES utf8mb4;\n")
-        f.write("SET FOREIGN_KEY_CHECKS = 0;\n\n")
-        
-        cursor = conn.cursor()
-        
-        # 获取所有表
-        cursor.execute("SHOW TABLES")
-        tables = [row[0] for row in cursor.fetchall()]
-        
-        for table in tables:
+    # 获取建表语句
+    cursor = conn.cursor()
+    cursor.execute(f"SHOW CREATE TABLE `{table}`")
+    create_sql = cursor.fetchone()[1]
+    cursor.close()
+    f.write(f"{create_sql};\n\n")
+    
+    # 流式读取数据（SSCursor 不在客户端缓存整表），每批合并为一条 INSERT
+    data_cursor = conn.cursor(pymysql.cursors.SSCursor)
+    data_cursor.execute(f"SELECT * FROM `{table}`")
+    columns_str = ', '.join([f'`{desc[0]}`' for desc in data_cursor.description])
+    formatters = _mysql_formatters(data_cursor.description)
+    
+    has_rows = False
+    for batch in _batches(data_cursor):
+        if not has_rows:
             f.write(f"-- ----------------------------\n")
-            f.write(f"-- Table structure for {table}\n")
+            f.write(f"-- Records of {table}\n")
             f.write(f"-- ----------------------------\n")
-            f.write(f"DROP TABLE IF EXISTS `{table}`;\n")
-            
-            # 获取建表语句
-            cursor.execute(f"SHOW CREATE TABLE `{table}`")
-            create_sql = cursor.fetchone()[1]
-            f.write(f"{create_sql};\n\n")
-            
-            # 获取数据
-            cursor.execute(f"SELECT * FROM `{table}`")
-            rows = cursor.fetchall()
-            
-            if rows:
-                f.write(f"-- ----------------------------\n")
-                f.write(f"-- Records of {table}\n")
-                f.write(f"-- ----------------------------\n")
-                
-                # 获取列名
-                cursor.execute(f"SHOW COLUMNS FROM `{table}`")
-                columns = [row[0] for row in cursor.fetchall()]
-                columns_str = ', '.join([f'`{c}`' for c in columns])
-                
-                for row in rows:
-                    values = []
-                    for val in row:
-                        if val is None:
-                            values.append('NULL')
-                        elif isinstance(val, (int, float)):
-                            values.append(str(val))
-                        elif isinstance(val, bytes):
-                            values.append(f"X'{val.hex()}'")
-                        elif isinstance(val, datetime):
-                            values.append(f"'{val.strftime('%Y-%m-%d %H:%M:%S')}'")
-                        else:
-                            escaped = str(val).replace("\\", "\\\\").replace("'", "\\'")
-                            values.append(f"'{escaped}'")
-                    
-                    values_str = ', '.join(values)
-                    f.write(f"INSERT INTO `{table}` ({columns_str}) VALUES ({values_str});\n")
-                
-                f.write("\n")
+            has_rows = True
         
-        f.write("SET FOREIGN_KEY_CHECKS = 1;\n")
+        values_tuples = [
+            '(' + ', '.join([fmt(val) for fmt, val in zip(formatters, row)]) + ')'
+            for row in batch
+        ]
         
-        cursor.close()
-        conn.close()
+        f.write(f"INSERT INTO `{table}` ({columns_str}) VALUES {','.join(values_tuples)};\n")
+    
+    data_cursor.close()
+    if has_rows:
+        f.write("\n")
 
 
-def dump_postgresql(db_config: DatabaseConfig, output_path: Path):
-    """使用 psycopg2 导出 PostgreSQL 数据库"""
-    import psycopg2
+def dump_mysql(db_config: DatabaseConfig, f):
+    """使用 pymysql 导出 MySQL 数据库，写入文本文件对象 f；各表并行导出"""
+    import pymysql
     
-    conn = psycopg2.connect(
-        host=db_config.host,
-        port=db_config.port or 5432,
-        user=db_config.username,
-        password=db_config.password,
-        database=db_config.database
-    )
+    def connect():
+        return pymysql.connect(
+            host=db_config.host,
+            port=db_config.port or 3306,
+            user=db_config.username,
+            password=db_config.password,
+            database=db_config.database,
+            charset='utf8mb4'
+        )
     
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(f"-- PostgreSQL Dump\n")
-        f.write(f"-- Database: {db_config.database}\n")
-        f.write(f"-- Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-        
+    def open_snapshot():
+        conn = connect()
         cursor = conn.cursor()
-        
-        # 获取所有表
-        cursor.execute("""
-            SELECT tablename FROM pg_tables 
-            WHERE schemaname = 'public'
-        """)
-        tables = [row[0] for row in cursor.fetchall()]
-        
-        for table in tables:
-            f.write(f"-- Table: {table}\n")
-            f.write(f"DROP TABLE IF EXISTS \"{table}\" CASCADE;\n")
-            
-            # 获取列信息
-            cursor.execute(f"""
-                SELECT column_name, data_type, is_nullable, column_default
-                FROM information_schema.columns
-                WHERE table_name = %s AND table_schema = 'public'
-                ORDER BY ordinal_position
-            """, (table,))
-            columns_info = cursor.fetchall()
-            
-            # 构建建表语句
-            col_defs = []
-            for col in columns_info:
-                col_def = f'"{col[0]}" {col[1]}'
-                if col[2] == 'NO':
-                    col_def += ' NOT NULL'
-                if col[3]:
-                    col_def += f' DEFAULT {col[3]}'
-                col_defs.append(col_def)
-            
-            f.write(f"CREATE TABLE \"{table}\" (\n  ")
-            f.write(',\n  '.join(col_defs))
-            f.write("\n);\n\n")
-            
-            # 导出数据
-            cursor.execute(f'SELECT * FROM "{table}"')
-            rows = cursor.fetchall()
+        cursor.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT")
+        cursor.close()
+        return conn
+    
+    f.write(f"-- MySQL Dump\n")
+    f.write(f"-- Database: {db_config.database}\n")
+    f.write(f"-- Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+    f.write("SET NAMES utf8mb4;\n")
+    f.write("SET FOREIGN_KEY_CHECKS = 0;\n\n")
+    
+    snapshots = []
+    try:
+        coordinator = connect()
+        try:
+            # 获取所有表
+            cursor = coordinator.cursor()
+            cursor.execute("SHOW TABLES")
+            tables = [row[0] for row in cursor.fetchall()]
             
-            if rows:
-                columns = [desc[0] for desc in cursor.description]
-                columns_str = ', '.join([f'"{c}"' for c in columns])
-                
-                for row in rows:
-                    values = []
-                    for val in row:
-                        if val is None:
-                            values.append('NULL')
-                        elif isinstance(val, (int, float)):
-                            values.append(str(val))
-                        elif isinstance(val, bytes):
-                            values.append(f"E'\\\\x{val.hex()}'")
-                        else:
-                            escaped = str(val).replace("'", "''")
-                            values.append(f"'{escaped}'")
-                    
-                    values_str = ', '.join(values)
-                    f.write(f"INSERT INTO \"{table}\" ({columns_str}) VALUES ({values_str});\n")
-                
-                f.write("\n")
+            # 默认单连接、单个一致性快照，不加全局锁。开启 MYSQL_PARALLEL_DUMP 时，
+            # 持全局读锁期间让每个工作连接开启快照，使所有快照对应同一时间点；
+            # 全局读锁会排在长查询之后并阻塞写入，因此限制等待时间，拿不到锁就退回单连接
+            workers = 1
+            locked = False
+            if Config.MYSQL_PARALLEL_DUMP and len(tables) > 1:
+                try:
+                    cursor.execute(f"SET SESSION lock_wait_timeout = {MYSQL_LOCK_WAIT_TIMEOUT}")
+                    cursor.execute("FLUSH TABLES WITH READ LOCK")
+                    locked = True
+                    workers = min(DUMP_WORKERS, len(tables))
+                except pymysql.err.MySQLError as e:
+                    log(f'FLUSH TABLES WITH READ LOCK failed, dumping {db_config.name} on one connection: {e}', 'warning')
+            try:
+                for _ in range(workers):
+                    snapshots.append(open_snapshot())
+            finally:
+                if locked:
+                    cursor.execute("UNLOCK TABLES")
+            cursor.close()
+        finally:
+            coordinator.close()
         
+        _dump_tables_parallel(tables, snapshots.pop, _dump_mysql_table, f, workers)
+    finally:
+        for conn in snapshots:  # 未被工作线程取走的连接
+            conn.close()
+    
+    f.write("SET FOREIGN_KEY_CHECKS = 1;\n")
+
+
+def _dump_postgresql_table(conn, table: str, f):
+    """导出单个 PostgreSQL 表的结构和数据"""
+    cursor = conn.cursor()
+    
+    f.write(f"-- Table: {table}\n")
+    f.write(f"DROP TABLE IF EXISTS \"{table}\" CASCADE;\n")
+    
+    # 获取列信息
+    cursor.execute(f"""
+        SELECT column_name, data_type, is_nullable, column_default
+        FROM information_schema.columns
+        WHERE table_name = %s AND table_schema = 'public'
+        ORDER BY ordinal_position
+    """, (table,))
+    columns_info = cursor.fetchall()
+    
+    # 构建建表语句
+    col_defs = []
+    for col in columns_info:
+        col_def = f'"{col[0]}" {col[1]}'
+        if col[2] == 'NO':
+            col_def += ' NOT NULL'
+        if col[3]:
+            col_def += f' DEFAULT {col[3]}'
+        col_defs.append(col_def)
+    
+    f.write(f"CREATE TABLE \"{table}\" (\n  ")
+    f.write(',\n  '.join(col_defs))
+    f.write("\n);\n\n")
+    
+    # 导出数据：COPY TO STDOUT 由服务端格式化，直接流入输出文件
+    columns_str = ', '.join([f'"{col[0]}"' for col in columns_info])
+    f.write(f'COPY "{table}" ({columns_str}) FROM stdin;\n')
+    cursor.copy_expert(f'COPY "{table}" ({columns_str}) TO STDOUT', f)
+    f.write("\\.\n\n")
+    
+    cursor.close()
+
+
+def dump_postgresql(db_config: DatabaseConfig, f):
+    """使用 psycopg2 导出 PostgreSQL 数据库，写入文本文件对象 f；各表并行导出"""
+    import psycopg2
+    
+    def connect():
+        return psycopg2.connect(
+            host=db_config.host,
+            port=db_config.port or 5432,
+            user=db_config.username,
+            password=db_config.password,
+            database=db_config.database
+        )
+    
+    f.write(f"-- PostgreSQL Dump\n")
+    f.write(f"-- Database: {db_config.database}\n")
+    f.write(f"-- Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+    
+    # 主连接导出快照，各工作连接共用同一快照，保证各表数据一致
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+    cursor.execute("SELECT pg_export_snapshot()")
+    snapshot_id = cursor.fetchone()[0]
+    
+    # 获取所有表
+    cursor.execute("""
+        SELECT tablename FROM pg_tables 
+        WHERE schemaname = 'public'
+    """)
+    tables = [row[0] for row in cursor.fetchall()]
+    
+    def connect_snapshot():
+        worker_conn = connect()
+        worker_cursor = worker_conn.cursor()
+        worker_cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+        worker_cursor.execute("SET TRANSACTION SNAPSHOT %s", (snapshot_id,))
+        worker_cursor.close()
+        return worker_conn
+    
+    try:
+        _dump_tables_parallel(tables, connect_snapshot, _dump_postgresql_table, f)
+    finally:
+        # 快照在主连接事务结束前一直有效
         cursor.close()
         conn.close()
 
 
-def dump_sqlite(db_config: DatabaseConfig, output_path: Path):
-    """导出 SQLite 数据库"""
+def dump_sqlite(db_config: DatabaseConfig, f):
+    """导出 SQLite 数据库，写入文本文件对象 f"""
     import sqlite3
     
     conn = sqlite3.connect(db_config.database)
     
-    with open(output_path, 'w', encoding='utf-8') as f:
-        for line in conn.iterdump():
-            f.write(f'{line}\n')
+    for line in conn.iterdump():
+        f.write(f'{line}\n')
     
     conn.close()
 
@@ -212,51 +490,47 @@ def dump_sqlite(db_config: DatabaseConfig, output_path: Path):
 def run_backup(db_config: DatabaseConfig, retry_count: int = 3) -> BackupHistory:
     """Execute backup for a database configuration"""
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    base_filename = f'{db_config.name}_{timestamp}.sql'
-    gz_filename = f'{base_filename}.gz'
+    dump_filename = f'{db_config.name}_{timestamp}{dump_suffix()}'
     
     backup = BackupHistory(
         database_id=db_config.id,
-        filename=gz_filename,
+        filename=dump_filename,
         status='pending'
     )
     db.session.add(backup)
     db.session.commit()
     
     start_time = time.time()
-    sql_path = BACKUP_DIR / base_filename
-    gz_path = BACKUP_DIR / gz_filename
+    dump_path = BACKUP_DIR / dump_filename
     
     for attempt in range(retry_count):
         try:
             log(f'Starting backup for {db_config.name} (attempt {attempt + 1})')
             
-            # 根据数据库类型选择导出方法
+            # 根据数据库类型选择导出方法，直接写入压缩文件
             if db_config.db_type == 'mysql':
-                dump_mysql(db_config, sql_path)
+                dump = dump_mysql
             elif db_config.db_type == 'postgresql':
-                dump_postgresql(db_config, sql_path)
+                dump = dump_postgresql
             elif db_config.db_type == 'sqlite':
-                dump_sqlite(db_config, sql_path)
+                dump = dump_sqlite
             else:
                 raise ValueError(f'Unsupported database type: {db_config.db_type}')
             
-            # Compress
-            with open(sql_path, 'rb') as f_in:
-                with gzip.open(gz_path, 'wb') as f_out:
-                    f_out.writelines(f_in)
-            
-            # Remove uncompressed file
-            sql_path.unlink()
+            # 压缩输出经 HashingWriter 写盘，哈希与写入同步完成，无需再读一遍文件
+            with open(dump_path, 'wb') as raw:
+                tee = HashingWriter(raw)
+                with open_dump(dump_path, 'w', tee) as f:
+                    dump(db_config, f)
+                backup.file_size = raw.tell()
             
             # Update backup record
-            backup.file_size = gz_path.stat().st_size
-            backup.file_hash = calculate_hash(gz_path)
+            backup.file_hash = tee.hexdigest()
             backup.duration = time.time() - start_time
             backup.status = 'success'
             db.session.commit()
             
-            log(f'Backup completed: {gz_filename} ({backup.file_size} bytes)')
+            log(f'Backup completed: {dump_filename} ({backup.file_size} bytes)')
             cleanup_old_backups(db_config)
             
             return backup
@@ -271,81 +545,127 @@ def run_backup(db_config: DatabaseConfig, retry_count: int = 3) -> BackupHistory
                 backup.duration = time.time() - start_time
                 db.session.commit()
                 
-                # Cleanup partial files
-                for p in [sql_path, gz_path]:
-                    if p.exists():
-                        p.unlink()
+                # Cleanup partial file
+                if dump_path.exists():
+                    dump_path.unlink()
             else:
                 time.sleep(5)  # Wait before retry
     
     return backup
 
 
+def _iter_statements(f, is_complete=None):
+    """Yield SQL statements one at a time from a dump file object
+
+    A statement ends at a line ending in ';'; is_complete can veto that when a
+    string literal spans lines (e.g. sqlite3.complete_statement).
+    """
+    buf = []
+    for line in f:
+        # 语句之间的注释和空行直接跳过
+        if not buf and (line.startswith('--') or not line.strip()):
+            continue
+        buf.append(line)
+        if line.endswith(';\n'):
+            statement = ''.join(buf)
+            if is_complete is None or is_complete(statement):
+                yield statement.strip()
+                buf.clear()
+    
+    statement = ''.join(buf).strip()
+    if statement:
+        yield statement
+
+
+class _CopyData:
+    """File-like view of a COPY data block, ending at the '\\.' line"""
+    
+    def __init__(self, f):
+        self.f = f
+        self.done = False
+    
+    def read(self, size: int = -1) -> str:
+        if self.done:
+            return ''
+        line = self.f.readline()
+        if not line or line == '\\.\n':
+            self.done = True
+            return ''
+        return line
+    
+    readline = read
+
+
 def restore_backup(backup: BackupHistory) -> bool:
     """Restore a database from backup"""
     db_config = backup.database
-    gz_path = BACKUP_DIR / backup.filename
+    dump_path = BACKUP_DIR / backup.filename
     
-    if not gz_path.exists():
+    if not dump_path.exists():
         log(f'Backup file not found: {backup.filename}', 'error')
         return False
     
     try:
-        # Decompress
-        sql_path = gz_path.with_suffix('')
-        with gzip.open(gz_path, 'rb') as f_in:
-            with open(sql_path, 'wb') as f_out:
-                f_out.writelines(f_in)
-        
-        # Read SQL content
-        with open(sql_path, 'r', encoding='utf-8') as f:
-            sql_content = f.read()
-        
-        # Execute restore based on database type
-        if db_config.db_type == 'mysql':
-            import pymysql
-            conn = pymysql.connect(
-                host=db_config.host,
-                port=db_config.port or 3306,
-                user=db_config.username,
-                password=db_config.password,
-                database=db_config.database,
-                charset='utf8mb4'
-            )
-            cursor = conn.cursor()
-            for statement in sql_content.split(';\n'):
-                statement = statement.strip()
-                if statement and not statement.startswith('--'):
+        # 流式解压，逐条读取语句，内存占用只与单条语句有关
+        with open_dump(dump_path) as f:
+            if db_config.db_type == 'mysql':
+                import pymysql
+                conn = pymysql.connect(
+                    host=db_config.host,
+                    port=db_config.port or 3306,
+                    user=db_config.username,
+                    password=db_config.password,
+                    database=db_config.database,
+                    charset='utf8mb4'
+                )
+                conn.begin()
+                cursor = conn.cursor()
+                for statement in _iter_statements(f):
                     try:
                         cursor.execute(statement)
                     except:
                         pass
-            conn.commit()
-            cursor.close()
-            conn.close()
-            
-        elif db_config.db_type == 'postgresql':
-            import psycopg2
-            conn = psycopg2.connect(
-                host=db_config.host,
-                port=db_config.port or 5432,
-                user=db_config.username,
-                password=db_config.password,
-                database=db_config.database
-            )
-            cursor = conn.cursor()
-            cursor.execute(sql_content)
-            conn.commit()
-            cursor.close()
-            conn.close()
-            
-        elif db_config.db_type == 'sqlite':
-            import sqlite3
-            conn = sqlite3.connect(db_config.database)
-            conn.executescript(sql_content)
-            conn.close()
+                conn.commit()
+                cursor.close()
+                conn.close()
+                
+            elif db_config.db_type == 'postgresql':
+                import psycopg2
+                conn = psycopg2.connect(
+                    host=db_config.host,
+                    port=db_config.port or 5432,
+                    user=db_config.username,
+                    password=db_config.password,
+                    database=db_config.database
+                )
+                cursor = conn.cursor()
+                # 普通语句每次往返发送一批；COPY 数据块交给 copy_expert，整个恢复在同一事务中
+                pending = []
+                for statement in _iter_statements(f):
+                    if statement.startswith('COPY ') and statement.endswith('FROM stdin;'):
+                        if pending:
+                            cursor.execute('\n'.join(pending))
+                            pending.clear()
+                        cursor.copy_expert(statement, _CopyData(f))
+                        continue
+                    pending.append(statement)
+                    if len(pending) >= RESTORE_BATCH_STATEMENTS:
+                        cursor.execute('\n'.join(pending))
+                        pending.clear()
+                if pending:
+                    cursor.execute('\n'.join(pending))
+                conn.commit()
+                cursor.close()
+                conn.close()
+                
+            elif db_config.db_type == 'sqlite':
+                import sqlite3
+                # iterdump 自带 BEGIN/COMMIT，交由脚本自身控制事务
+                conn = sqlite3.connect(db_config.database, isolation_level=None)
+                for statement in _iter_statements(f, sqlite3.complete_statement):
+                    conn.execute(statement)
+                conn.close()
         
-        sql_path.unlink()
         log(f'Restore completed: {backup.filename}')
         return True
         
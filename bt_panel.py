@@ -5,23 +5,56 @@
 
 import hashlib
 import time
-import requests
+import httpx
 from typing import Optional
 
+try:
+    import h2  # noqa: F401  httpx 的 HTTP/2 支持（httpx[http2]）
+    HTTP2 = True
+except ImportError:
+    HTTP2 = False
+
+RECYCLE_TTL = 3600  # 回收站清空后多久内不再重复请求（秒）
+
 class BtPanel:
-    def __init__(self, url: str, api_key: str):
+    def __init__(self, url: str, api_key: str, verify: bool = False):
         """
         初始化宝塔面板 API
         :param url: 面板地址，如 http://104.250.137.18:8888
         :param api_key: API 密钥（在面板设置 -> API接口 中获取）
+        :param verify: 是否校验 HTTPS 证书（面板默认自签名证书，故默认不校验）
         """
         self.url = url.rstrip('/')
         self.api_key = api_key
+        # 签名中的 md5(api_key) 不变，只算一次
+        self._key_md5 = hashlib.md5(api_key.encode()).hexdigest().encode()
+        self._backup_path = None
+        self._recycle_cleared_until = 0.0
+        
+        # 复用连接（keep-alive）；HTTPS 面板且装了 h2 时多个请求复用同一条 HTTP/2 连接
+        # retries 只重试建立连接失败，不会重放已发出的请求
+        transport = httpx.HTTPTransport(
+            http2=HTTP2,
+            verify=verify,
+            retries=3,
+            limits=httpx.Limits(max_connections=8, max_keepalive_connections=4),
+        )
+        self.client = httpx.Client(transport=transport, timeout=httpx.Timeout(300.0))
+    
+    def close(self):
+        """关闭底层连接池"""
+        self.client.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
     
     def _sign(self) -> dict:
         """生成签名"""
         now_time = int(time.time())
-        token = hashlib.md5(f"{now_time}{hashlib.md5(self.api_key.encode()).hexdigest()}".encode()).hexdigest()
+        token = hashlib.md5(str(now_time).encode() + self._key_md5).hexdigest()
         return {
             'request_token': token,
             'request_time': now_time
@@ -35,7 +68,7 @@ class BtPanel:
             post_data.update(data)
         
         try:
-            response = requests.post(url, data=post_data, timeout=300, verify=False)
+            response = self.client.post(url, data=post_data)
             return response.json()
         except Exception as e:
             return {'status': False, 'msg': str(e)}
@@ -103,12 +136,35 @@ class BtPanel:
         return result
     
     def get_backup_path(self) -> str:
-        """获取备份目录路径"""
+        """获取备份目录路径（面板配置基本不变，成功取到后缓存在实例上）"""
+        if self._backup_path:
+            return self._backup_path
         result = self._request('/config?action=get_config')
         if result.get('backup_path'):
-            return result['backup_path']
+            self._backup_path = result['backup_path']
+            return self._backup_path
         return '/www/backup/database'
     
+    def clear_recycle_bin(self, force: bool = False) -> dict:
+        """
+        清空回收站；RECYCLE_TTL 秒内已清空过则跳过请求
+        :param force: 刚有文件被移入回收站时强制清空
+        """
+        if not force and time.time() < self._recycle_cleared_until:
+            return {'status': True, 'msg': 'skipped (recently cleared)'}
+        
+        result = self._request('/files?action=Close_Recycle_bin', {
+            'status': 1
+        })
+        if not result.get('status'):
+            # 尝试另一种方式清空回收站
+            result = self._request('/files?action=Re_Recycle_bin', {
+                'path': 'all'
+            })
+        if result.get('status'):
+            self._recycle_cleared_until = time.time() + RECYCLE_TTL
+        return result
+    
     def delete_backup(self, backup_id: int) -> dict:
         """
         删除备份文件
@@ -178,15 +234,14 @@ class BtPanel:
 def test_bt_api():
     """测试宝塔 API"""
     # 替换为你的面板地址和 API 密钥
-    bt = BtPanel('http://104.250.137.18:8888', 'your_api_key')
-    
-    # 测试连接
-    result = bt.test_connection()
-    print("Connection test:", result)
-    
-    # 获取数据库列表
-    result = bt.get_databases()
-    print("Databases:", result)
+    with BtPanel('http://104.250.137.18:8888', 'your_api_key') as bt:
+        # 测试连接
+        result = bt.test_connection()
+        print("Connection test:", result)
+        
+        # 获取数据库列表
+        result = bt.get_databases()
+        print("Databases:", result)
 
 
 if __name__ == '__main__':
@@ -1,5 +1,6 @@
 import os
 import base64
+from functools import lru_cache
 from pathlib import Path
 from cryptography.fernet import Fernet
 from dotenv import load_dotenv
@@ -28,6 +29,7 @@ def encrypt(text: str) -> str:
         return ''
     return cipher.encrypt(text.encode()).decode()
 
+@lru_cache(maxsize=256)  # 同一密文只解密一次（密钥进程内不变）
 def decrypt(token: str) -> str:
     if not token:
         return ''
@@ -40,6 +42,21 @@ class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key-change-me')
     SQLALCHEMY_DATABASE_URI = f'sqlite:///{BASE_DIR}/data.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': 10,
+        'pool_pre_ping': True,
+    }
+    # 调试用：未预加载的关系被访问时抛错
+    SQLALCHEMY_RAISELOAD = os.getenv('SQLALCHEMY_RAISELOAD', '0') == '1'
+    
+    # 由前端服务器（X-Sendfile）直接发送备份文件
+    USE_X_SENDFILE = os.getenv('X_SENDFILE', '0') == '1'
+    
+    # MySQL 多连接并行导出：需要 RELOAD 权限，开启快照时会短暂持有 FLUSH TABLES WITH READ LOCK
+    MYSQL_PARALLEL_DUMP = os.getenv('MYSQL_PARALLEL_DUMP', '0') == '1'
+    
+    CACHE_TYPE = 'SimpleCache'
+    CACHE_DEFAULT_TIMEOUT = 300
     
     TG_BOT_TOKEN = os.getenv('TG_BOT_TOKEN', '')
     TG_CHAT_IDS = [x.strip() for x in os.getenv('TG_CHAT_IDS', '').split(',') if x.strip()]
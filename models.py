@@ -1,9 +1,35 @@
+import sqlite3
 from datetime import datetime
+from functools import lru_cache
+from sqlalchemy import event, func, cast, inspect, select, and_, Integer, Text
+from sqlalchemy.dialects import sqlite as sqlite_dialect, postgresql as postgresql_dialect, mysql as mysql_dialect
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, object_session, aliased
 from flask_sqlalchemy import SQLAlchemy
+from flask_caching import Cache
 from flask_login import UserMixin
 from config import encrypt, decrypt
 
 db = SQLAlchemy()
+cache = Cache()
+
+@event.listens_for(Engine, 'connect')
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """SQLite 使用 WAL，读写互不阻塞"""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA temp_store=MEMORY')
+    cursor.execute('PRAGMA mmap_size=268435456')
+    cursor.close()
+
+def ensure_indexes():
+    """补建已有表上新增的索引（create_all 不会修改已存在的表）"""
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
 
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -31,15 +57,27 @@ class DatabaseConfig(db.Model):
     schedule_day = db.Column(db.Integer, default=0)  # 0=Monday for weekly
     schedule_cron = db.Column(db.String(100))  # custom cron expression
     
-    backups = db.relationship('BackupHistory', backref='database', lazy=True, cascade='all, delete-orphan')
+    __table_args__ = (
+        db.Index('ix_cfg_enabled_sched', 'enabled', 'schedule_enabled'),
+    )
+    
+    # 完整历史只在显式加载时使用（如级联删除），列表页读 last_backup
+    backups = db.relationship('BackupHistory', backref='database', lazy='raise', cascade='all, delete-orphan')
     
     @property
     def password(self):
-        return decrypt(self._password) if self._password else ''
+        # 按密文缓存明文，密文未变时不再解密
+        if not self._password:
+            return ''
+        if self._password != getattr(self, '_pw_cipher_cache', None):
+            self._pw_plain_cache = decrypt(self._password)
+            self._pw_cipher_cache = self._password
+        return self._pw_plain_cache
     
     @password.setter
     def password(self, value):
         self._password = encrypt(value) if value else ''
+        self._pw_cipher_cache = self._pw_plain_cache = None
     
     def to_dict(self):
         return {
@@ -56,15 +94,15 @@ class DatabaseConfig(db.Model):
             'schedule_time': self.schedule_time,
             'schedule_day': self.schedule_day,
             'schedule_cron': self.schedule_cron,
-            'last_backup': self.backups[-1].to_dict() if self.backups else None
+            'last_backup': self.last_backup.to_dict() if self.last_backup else None
         }
 
 class BackupHistory(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     database_id = db.Column(db.Integer, db.ForeignKey('database_config.id'), nullable=True)  # 允许为空（宝塔备份）
     filename = db.Column(db.String(255), nullable=False)
-    file_size = db.Column(db.Integer)
-    file_hash = db.Column(db.String(64))
+    file_size = db.Column(db.BigInteger)  # bytes; dumps can exceed 2 GiB
+    file_hash = db.Column(db.String(80))  # 'blake3:<hex>' 或 SHA-256 hex
     status = db.Column(db.String(20), default='pending')  # pending, success, failed
     error_message = db.Column(db.Text)
     duration = db.Column(db.Float)  # seconds
@@ -72,6 +110,12 @@ class BackupHistory(db.Model):
     tg_file_id = db.Column(db.String(255))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_backup_created_id', 'created_at', 'id'),
+        db.Index('ix_backup_status_created', 'status', 'created_at'),
+        db.Index('ix_bh_db_created', database_id, created_at.desc()),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -79,24 +123,43 @@ class BackupHistory(db.Model):
             'database_name': self.database.name if self.database else None,
             'filename': self.filename,
             'file_size': self.file_size,
-            'file_size_str': self.format_size(self.file_size),
+            'file_size_str': self.file_size_str,
             'file_hash': self.file_hash,
             'status': self.status,
             'error_message': self.error_message,
             'duration': round(self.duration, 2) if self.duration else None,
             'tg_uploaded': self.tg_uploaded,
-            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S')
+            'created_at': self.created_at.isoformat(sep=' ', timespec='seconds')
         }
     
+    @property
+    def file_size_str(self):
+        # format_size 已按大小缓存结果，这里不在实例上另存，避免 file_size 变化后读到旧值
+        return self.format_size(self.file_size)
+    
     @staticmethod
+    @lru_cache(maxsize=1024)
     def format_size(size):
         if not size:
             return '0 B'
-        for unit in ['B', 'KB', 'MB', 'GB']:
-            if size < 1024:
-                return f'{size:.1f} {unit}'
-            size /= 1024
-        return f'{size:.1f} TB'
+        # 二进制位数直接定位单位：每 10 位进一级
+        idx = min((int(size).bit_length() - 1) // 10, 4)
+        return f"{size / (1 << (10 * idx)):.1f} {('B', 'KB', 'MB', 'GB', 'TB')[idx]}"
+
+# 每个数据库的最新一条备份：关联子查询按 (database_id, created_at desc) 索引取第一条，
+# 列表接口 selectinload 时一条 IN 查询取回所有配置的最新备份，不再逐个加载完整历史
+_bh = aliased(BackupHistory)
+_latest_backup_id = select(_bh.id).where(
+    _bh.database_id == BackupHistory.database_id
+).order_by(_bh.created_at.desc(), _bh.id.desc()).limit(1).scalar_subquery()
+
+DatabaseConfig.last_backup = db.relationship(
+    BackupHistory,
+    primaryjoin=and_(BackupHistory.database_id == DatabaseConfig.id, BackupHistory.id == _latest_backup_id),
+    uselist=False,
+    viewonly=True,
+    lazy='select'  # 只有序列化用到，需要的查询自行 selectinload
+)
 
 class SystemLog(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -105,13 +168,18 @@ class SystemLog(db.Model):
     details = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_log_created_id', 'created_at', 'id'),
+        db.Index('ix_log_level_created', 'level', 'created_at'),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
             'level': self.level,
             'message': self.message,
             'details': self.details,
-            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S')
+            'created_at': self.created_at.isoformat(sep=' ', timespec='seconds')
         }
 
 class Settings(db.Model):
@@ -121,18 +189,49 @@ class Settings(db.Model):
     
     @classmethod
     def get(cls, key, default=None):
-        setting = cls.query.filter_by(key=key).first()
-        return setting.value if setting else default
+        value = settings_get(key)
+        return value if value is not None else default
+    
+    @classmethod
+    def get_many(cls, *keys):
+        """一次查询读取多个配置项，返回 {key: value}，不存在的键不在结果中"""
+        rows = db.session.query(cls.key, cls.value).filter(cls.key.in_(keys)).all()
+        return dict(rows)
     
     @classmethod
     def set(cls, key, value):
-        setting = cls.query.filter_by(key=key).first()
-        if setting:
-            setting.value = str(value)
+        """单条 upsert 写入配置，不支持的数据库退回先查询再更新"""
+        value = str(value)
+        dialect = db.session.get_bind().dialect.name
+        if dialect in ('sqlite', 'postgresql'):
+            insert = sqlite_dialect.insert if dialect == 'sqlite' else postgresql_dialect.insert
+            stmt = insert(cls).values(key=key, value=value)
+            stmt = stmt.on_conflict_do_update(index_elements=['key'], set_={'value': stmt.excluded.value})
+            db.session.execute(stmt)
+        elif dialect in ('mysql', 'mariadb'):
+            stmt = mysql_dialect.insert(cls).values(key=key, value=value)
+            stmt = stmt.on_duplicate_key_update(value=stmt.inserted.value)
+            db.session.execute(stmt)
         else:
-            setting = cls(key=key, value=str(value))
-            db.session.add(setting)
+            setting = cls.query.filter_by(key=key).first()
+            if setting:
+                setting.value = value
+            else:
+                db.session.add(cls(key=key, value=value))
         db.session.commit()
+        cache.delete_memoized(settings_get, key)
+    
+    @classmethod
+    def upsert(cls, key, value):
+        """兼容旧调用，等同于 set"""
+        cls.set(key, value)
+
+
+@cache.memoize(timeout=300, cache_none=True)
+def settings_get(key):
+    """读取配置项（缓存5分钟，Settings.set 时失效）"""
+    setting = Settings.query.filter_by(key=key).first()
+    return setting.value if setting else None
 
 
 class BtPanelConfig(db.Model):
@@ -145,15 +244,22 @@ class BtPanelConfig(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # 关联的数据库配置
-    databases = db.relationship('BtDatabaseConfig', backref='panel', lazy=True, cascade='all, delete-orphan')
+    databases = db.relationship('BtDatabaseConfig', backref=db.backref('panel', lazy='joined'), lazy=True, cascade='all, delete-orphan')
     
     @property
     def api_key(self):
-        return decrypt(self._api_key) if self._api_key else ''
+        # 按密文缓存明文，密文未变时不再解密
+        if not self._api_key:
+            return ''
+        if self._api_key != getattr(self, '_key_cipher_cache', None):
+            self._key_plain_cache = decrypt(self._api_key)
+            self._key_cipher_cache = self._api_key
+        return self._key_plain_cache
     
     @api_key.setter
     def api_key(self, value):
         self._api_key = encrypt(value) if value else ''
+        self._key_cipher_cache = self._key_plain_cache = None
     
     def to_dict(self):
         return {
@@ -161,12 +267,16 @@ class BtPanelConfig(db.Model):
             'name': self.name,
             'url': self.url,
             'enabled': self.enabled,
-            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S')
+            'created_at': self.created_at.isoformat(sep=' ', timespec='seconds')
         }
 
 
 class BtDatabaseConfig(db.Model):
     """宝塔面板数据库定时备份配置"""
+    __table_args__ = (
+        db.Index('ix_btdb_enabled_sched', 'enabled', 'schedule_enabled'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     panel_id = db.Column(db.Integer, db.ForeignKey('bt_panel_config.id'), nullable=False)
     bt_db_id = db.Column(db.Integer, nullable=False)  # 宝塔数据库ID
@@ -200,3 +310,86 @@ class BtDatabaseConfig(db.Model):
             'schedule_minutes': self.schedule_minutes,
             'push_to_tg': self.push_to_tg
         }
+
+
+class BtBackupLock(db.Model):
+    """宝塔备份进行中标记，config_id 为主键，防止同一配置的备份重叠执行"""
+    config_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    started_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+# ==================== 备份计数器 ====================
+# 仪表盘统计从 Settings 读取计数，避免每次 COUNT(*) 扫描备份表
+
+BACKUP_TOTAL_KEY = 'backup_counter_total'
+BACKUP_STATUS_KEYS = {
+    'success': 'backup_counter_success',
+    'failed': 'backup_counter_failed',
+}
+
+def init_backup_counters():
+    """首次启动时根据现有备份记录初始化计数器"""
+    if Settings.get(BACKUP_TOTAL_KEY) is not None:
+        return
+    counts = dict(
+        db.session.query(BackupHistory.status, func.count(BackupHistory.id))
+        .group_by(BackupHistory.status).all()
+    )
+    for status, key in BACKUP_STATUS_KEYS.items():
+        Settings.set(key, counts.get(status, 0))
+    Settings.set(BACKUP_TOTAL_KEY, sum(counts.values()))
+
+def get_backup_counters() -> dict:
+    counters = {status: int(Settings.get(key, 0)) for status, key in BACKUP_STATUS_KEYS.items()}
+    counters['total'] = int(Settings.get(BACKUP_TOTAL_KEY, 0))
+    return counters
+
+def _bump_counters(connection, target, deltas: dict):
+    """在当前 flush 的连接上更新计数，与备份记录同一事务提交"""
+    table = Settings.__table__
+    for key, delta in deltas.items():
+        if not delta:
+            continue
+        result = connection.execute(
+            table.update()
+            .where(table.c.key == key)
+            .values(value=cast(cast(table.c.value, Integer) + delta, Text))
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(key=key, value=str(max(delta, 0))))
+    
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('dirty_settings', set()).update(deltas)
+
+@event.listens_for(BackupHistory, 'after_insert')
+def _backup_inserted(mapper, connection, target):
+    deltas = {BACKUP_TOTAL_KEY: 1}
+    if target.status in BACKUP_STATUS_KEYS:
+        deltas[BACKUP_STATUS_KEYS[target.status]] = 1
+    _bump_counters(connection, target, deltas)
+
+@event.listens_for(BackupHistory, 'after_delete')
+def _backup_deleted(mapper, connection, target):
+    deltas = {BACKUP_TOTAL_KEY: -1}
+    if target.status in BACKUP_STATUS_KEYS:
+        deltas[BACKUP_STATUS_KEYS[target.status]] = -1
+    _bump_counters(connection, target, deltas)
+
+@event.listens_for(BackupHistory, 'after_update')
+def _backup_updated(mapper, connection, target):
+    history = inspect(target).attrs.status.history
+    if not history.has_changes():
+        return
+    deltas = dict.fromkeys(BACKUP_STATUS_KEYS.values(), 0)
+    for old in history.deleted:
+        if old in BACKUP_STATUS_KEYS:
+            deltas[BACKUP_STATUS_KEYS[old]] -= 1
+    if target.status in BACKUP_STATUS_KEYS:
+        deltas[BACKUP_STATUS_KEYS[target.status]] += 1
+    _bump_counters(connection, target, deltas)
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_settings_cache(session):
+    for key in session.info.pop('dirty_settings', ()):
+        cache.delete_memoized(settings_get, key)
@@ -1,17 +1,42 @@
+import os
+from functools import lru_cache
+from apscheduler.executors.pool import ThreadPoolExecutor
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
-from models import db, DatabaseConfig
-from backup import run_backup, log
+from sqlalchemy.orm import load_only
+from models import db, cache, DatabaseConfig, BackupHistory
+from config import BACKUP_DIR
+from backup import run_backup, calculate_hash, log, start_log_writer
 from telegram_bot import sync_upload_backup, sync_send_notification
 
-scheduler = BackgroundScheduler()
+# Local dumps are CPU/disk heavy; keep them on their own small pool so they
+# can't starve uploads, notifications and BT panel jobs on the default pool.
+DUMP_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+
+scheduler = BackgroundScheduler(executors={
+    'default': ThreadPoolExecutor(8),
+    'dumps': ThreadPoolExecutor(DUMP_WORKERS),
+})
+
+JOBS_CACHE_KEY = 'dash_jobs'
+
+# Schedule signature per registered backup job; saves that don't touch the
+# schedule leave the job alone instead of removing and re-adding it
+_job_sig = {}
 
 def backup_job(db_id: int):
     """Execute backup job for a database"""
     from app import app
     
     with app.app_context():
-        db_config = DatabaseConfig.query.get(db_id)
+        # Connection fields only
+        db_config = db.session.get(DatabaseConfig, db_id, options=[
+            load_only(
+                DatabaseConfig.id, DatabaseConfig.name, DatabaseConfig.enabled, DatabaseConfig.db_type,
+                DatabaseConfig.host, DatabaseConfig.port, DatabaseConfig.database,
+                DatabaseConfig.username, DatabaseConfig._password
+            )
+        ])
         if not db_config or not db_config.enabled:
             return
         
@@ -33,20 +58,114 @@ def backup_job(db_id: int):
                 f"⚠️ Error: {backup.error_message}"
             )
 
+def upload_job(backup_id: int, message: str = None, delete_local: bool = False):
+    """Hash and upload a finished backup to Telegram in the background"""
+    from app import app
+    
+    with app.app_context():
+        backup = db.session.get(BackupHistory, backup_id)
+        if not backup:
+            return
+        
+        filepath = BACKUP_DIR / backup.filename
+        if not backup.file_hash and filepath.exists():
+            # Committed together with tg_uploaded by the upload itself
+            backup.file_hash = calculate_hash(filepath)
+        
+        sync_upload_backup(backup)
+        if backup in db.session.dirty:
+            db.session.commit()  # upload failed before its commit; keep the hash
+        
+        if delete_local:
+            try:
+                filepath.unlink()
+                log(f'Deleted local backup: {backup.filename}')
+            except Exception as e:
+                log(f'Failed to delete local backup: {e}', 'warning')
+        
+        if message:
+            sync_send_notification(message)
+
+def enqueue_upload(backup: BackupHistory, message: str = None, delete_local: bool = False):
+    """Schedule a one-shot upload job so the caller doesn't block on hashing or Telegram"""
+    scheduler.add_job(
+        upload_job,
+        'date',
+        args=[backup.id, message, delete_local],
+        id=f'tg_upload_{backup.id}',
+        name=f'Upload: {backup.filename}',
+        misfire_grace_time=3600,
+        replace_existing=True
+    )
+
+def notify_job(message: str):
+    """Send a Telegram notification in the background"""
+    from app import app
+    
+    with app.app_context():
+        sync_send_notification(message)
+
+def enqueue_notification(message: str):
+    """Schedule a one-shot notification job so request handlers don't wait on Telegram"""
+    scheduler.add_job(
+        notify_job,
+        'date',
+        args=[message],
+        name='Notify',
+        misfire_grace_time=3600
+    )
+
+def upload_file_job(filename: str):
+    """Push a local file to Telegram without a history record, then delete it"""
+    from app import app
+    
+    with app.app_context():
+        filepath = BACKUP_DIR / filename
+        if not filepath.exists():
+            return
+        
+        # Transient record for the caption only; never added to the session
+        backup = BackupHistory(filename=filename, file_size=filepath.stat().st_size, status='success')
+        if sync_upload_backup(backup):
+            log(f'Pushed {filename} to Telegram')
+        
+        try:
+            filepath.unlink()
+        except Exception as e:
+            log(f'Failed to delete local backup: {e}', 'warning')
+
+def enqueue_file_upload(filename: str):
+    scheduler.add_job(
+        upload_file_job,
+        'date',
+        args=[filename],
+        id=f'tg_upload_file_{filename}',
+        name=f'Upload: {filename}',
+        misfire_grace_time=3600,
+        replace_existing=True
+    )
+
+@lru_cache(maxsize=128)
+def parse_schedule_time(value: str) -> tuple:
+    """Split 'HH:MM' into (hour, minute), memoized across configs"""
+    hour, minute = (value or '03:00').split(':')
+    return hour, minute
+
 def get_cron_trigger(db_config: DatabaseConfig) -> CronTrigger:
     """Convert schedule settings to APScheduler CronTrigger"""
     if db_config.schedule_type == 'custom' and db_config.schedule_cron:
         parts = db_config.schedule_cron.split()
         if len(parts) == 5:
+            minute, hour, day, month, day_of_week = parts
             return CronTrigger(
-                minute=parts[0],
-                hour=parts[1],
-                day=parts[2],
-                month=parts[3],
-                day_of_week=parts[4]
+                minute=minute,
+                hour=hour,
+                day=day,
+                month=month,
+                day_of_week=day_of_week
             )
     
-    hour, minute = (db_config.schedule_time or '03:00').split(':')
+    hour, minute = parse_schedule_time(db_config.schedule_time)
     
     if db_config.schedule_type == 'hourly':
         return CronTrigger(minute=minute)
@@ -64,36 +183,70 @@ def get_cron_trigger(db_config: DatabaseConfig) -> CronTrigger:
 def update_job(db_config: DatabaseConfig):
     """Update or add a backup job for a database"""
     job_id = f'backup_{db_config.id}'
+    active = bool(db_config.enabled and db_config.schedule_enabled)
+    sig = (db_config.schedule_type, db_config.schedule_time, db_config.schedule_day,
+           db_config.schedule_cron, db_config.name, active)
+    if _job_sig.get(job_id) == sig:
+        return
     
-    # Remove existing job
-    if scheduler.get_job(job_id):
-        scheduler.remove_job(job_id)
-    
-    # Add new job if enabled
-    if db_config.enabled and db_config.schedule_enabled:
-        trigger = get_cron_trigger(db_config)
-        scheduler.add_job(
-            backup_job,
-            trigger=trigger,
-            args=[db_config.id],
-            id=job_id,
-            name=f'Backup: {db_config.name}',
-            replace_existing=True
-        )
-        log(f'Scheduled backup for {db_config.name}: {db_config.schedule_type}')
+    try:
+        # Remove existing job
+        if scheduler.get_job(job_id):
+            scheduler.remove_job(job_id)
+        cache.delete(JOBS_CACHE_KEY)
+        
+        # Add new job if enabled
+        if active:
+            trigger = get_cron_trigger(db_config)
+            scheduler.add_job(
+                backup_job,
+                trigger=trigger,
+                args=[db_config.id],
+                id=job_id,
+                name=f'Backup: {db_config.name}',
+                executor='dumps',
+                # A late or overlapping fire runs once, never as a second concurrent dump
+                max_instances=1,
+                coalesce=True,
+                misfire_grace_time=3600,
+                replace_existing=True
+            )
+            log(f'Scheduled backup for {db_config.name}: {db_config.schedule_type}')
+    except Exception:
+        # e.g. an invalid schedule_cron: forget the signature so the next save retries
+        _job_sig.pop(job_id, None)
+        raise
+    _job_sig[job_id] = sig
 
 def remove_job(db_id: int):
     """Remove a backup job"""
     job_id = f'backup_{db_id}'
+    _job_sig.pop(job_id, None)
     if scheduler.get_job(job_id):
         scheduler.remove_job(job_id)
+    cache.delete(JOBS_CACHE_KEY)
 
 def init_scheduler(app):
     """Initialize scheduler with existing database configs"""
+    start_log_writer(app)
+    
     with app.app_context():
-        configs = DatabaseConfig.query.filter_by(enabled=True, schedule_enabled=True).all()
-        for config in configs:
-            update_job(config)
+        # Only the schedule fields; connection details and the encrypted password aren't needed here
+        configs = DatabaseConfig.query.options(load_only(
+            DatabaseConfig.id, DatabaseConfig.name, DatabaseConfig.enabled,
+            DatabaseConfig.schedule_enabled, DatabaseConfig.schedule_type,
+            DatabaseConfig.schedule_time, DatabaseConfig.schedule_day, DatabaseConfig.schedule_cron
+        )).filter_by(enabled=True, schedule_enabled=True).all()
+        # Pause a running scheduler while registering so it wakes up once, not per job
+        paused = scheduler.running
+        if paused:
+            scheduler.pause()
+        try:
+            for config in configs:
+                update_job(config)
+        finally:
+            if paused:
+                scheduler.resume()
     
     if not scheduler.running:
         scheduler.start()
@@ -109,3 +262,9 @@ def get_scheduled_jobs():
             'next_run': job.next_run_time.strftime('%Y-%m-%d %H:%M:%S') if job.next_run_time else None
         })
     return jobs
+
+
+@cache.cached(timeout=10, key_prefix=JOBS_CACHE_KEY)
+def get_cached_jobs():
+    """Scheduled jobs for the dashboard, cached for 10 seconds"""
+    return get_scheduled_jobs()
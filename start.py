@@ -7,6 +7,7 @@ DB Backup Bot 启动脚本
 
 import os
 import sys
+import hashlib
 import subprocess
 import shutil
 from pathlib import Path
@@ -17,6 +18,7 @@ REQUIREMENTS = BASE_DIR / "requirements.txt"
 ENV_FILE = BASE_DIR / ".env"
 ENV_EXAMPLE = BASE_DIR / ".env.example"
 BACKUPS_DIR = BASE_DIR / "backups"
+REQ_MARKER = VENV_DIR / ".req_sha"  # 上次成功安装时 requirements.txt 的哈希
 
 
 def run_cmd(cmd, check=True):
@@ -57,8 +59,17 @@ def install_deps():
         print("[错误] 虚拟环境创建失败")
         return False
     
+    # requirements.txt 未变化时跳过 pip，避免每次启动都做依赖解析
+    req_sha = hashlib.sha256(REQUIREMENTS.read_bytes()).hexdigest()
+    if REQ_MARKER.exists() and REQ_MARKER.read_text().strip() == req_sha:
+        print("[INFO] 依赖未变化，跳过安装")
+        return True
+    
     print("[INFO] 安装依赖...")
-    return run_cmd([str(venv_pip), "install", "-r", str(REQUIREMENTS)])
+    if not run_cmd([str(venv_pip), "install", "-r", str(REQUIREMENTS)]):
+        return False
+    REQ_MARKER.write_text(req_sha)
+    return True
 
 
 def setup_env():
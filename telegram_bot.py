@@ -1,5 +1,7 @@
 import asyncio
 import math
+import os
+import threading
 from pathlib import Path
 from telegram import Bot
 from telegram.error import TelegramError
@@ -9,11 +11,36 @@ from backup import log
 
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB Telegram limit
 
+# One event loop on a daemon thread serves every sync_* call, so Bot instances
+# (and their httpx connection pools, which are bound to a loop) live across jobs
+_loop = None
+_loop_lock = threading.Lock()
+_bots = {}
+
+def get_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name='telegram-loop', daemon=True).start()
+    return _loop
+
+def run_sync(coro):
+    """Run a coroutine on the shared loop and wait for its result.
+
+    The caller's context (including the Flask app context) is carried over
+    to the task, so coroutines can use the database session as before.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, get_loop()).result()
+
 def get_bot():
     token = Settings.get('tg_bot_token', Config.TG_BOT_TOKEN)
     if not token:
         return None
-    return Bot(token=token)
+    bot = _bots.get(token)
+    if bot is None:
+        bot = _bots[token] = Bot(token=token)
+    return bot
 
 def get_chat_ids():
     ids = Settings.get('tg_chat_ids', '')
@@ -21,6 +48,17 @@ def get_chat_ids():
         return [x.strip() for x in ids.split(',') if x.strip()]
     return Config.TG_CHAT_IDS
 
+async def fan_out(send, chat_ids: list) -> dict:
+    """Run send(chat_id) for all chats concurrently; return {chat_id: TelegramError} for failures"""
+    results = await asyncio.gather(*(send(chat_id) for chat_id in chat_ids), return_exceptions=True)
+    errors = {}
+    for chat_id, result in zip(chat_ids, results):
+        if isinstance(result, TelegramError):
+            errors[chat_id] = result
+        elif isinstance(result, BaseException):
+            raise result
+    return errors
+
 async def send_notification(message: str, parse_mode: str = 'HTML'):
     """Send text notification to all configured chats"""
     bot = get_bot()
@@ -33,15 +71,26 @@ async def send_notification(message: str, parse_mode: str = 'HTML'):
         log('No Telegram chat IDs configured', 'warning')
         return False
     
-    success = True
-    for chat_id in chat_ids:
-        try:
-            await bot.send_message(chat_id=chat_id, text=message, parse_mode=parse_mode)
-        except TelegramError as e:
-            log(f'Failed to send notification to {chat_id}: {e}', 'error')
-            success = False
+    errors = await fan_out(
+        lambda chat_id: bot.send_message(chat_id=chat_id, text=message, parse_mode=parse_mode),
+        chat_ids
+    )
+    for chat_id, e in errors.items():
+        log(f'Failed to send notification to {chat_id}: {e}', 'error')
     
-    return success
+    return not errors
+
+def backup_caption(backup: BackupHistory) -> str:
+    """HTML caption for a backup document"""
+    # 获取数据库名称（兼容宝塔备份没有关联数据库的情况）
+    db_name = backup.database.name if backup.database else backup.filename.split('_')[0]
+    return (
+        f"🗄️ <b>Database Backup</b>\n"
+        f"📊 DB: {db_name}\n"
+        f"📁 File: {backup.filename}\n"
+        f"📏 Size: {backup.file_size_str}\n"
+        f"🔐 Hash: <code>{(backup.file_hash or '-').rpartition(':')[2][:16]}...</code>"
+    )
 
 async def upload_backup(backup: BackupHistory) -> bool:
     """Upload backup file to Telegram"""
@@ -55,6 +104,25 @@ async def upload_backup(backup: BackupHistory) -> bool:
         log('No Telegram chat IDs configured', 'warning')
         return False
     
+    if backup.tg_file_id:
+        # Already on Telegram: re-send by file_id and only re-upload where that fails
+        caption = backup_caption(backup)
+        errors = await fan_out(
+            lambda chat_id: bot.send_document(
+                chat_id=chat_id,
+                document=backup.tg_file_id,
+                caption=caption,
+                parse_mode='HTML'
+            ),
+            chat_ids
+        )
+        if not errors:
+            log(f'Re-sent backup to Telegram by file_id: {backup.filename}')
+            return True
+        for chat_id, e in errors.items():
+            log(f'Failed to re-send {backup.filename} to {chat_id} by file_id: {e}', 'warning')
+        chat_ids = list(errors)
+    
     filepath = BACKUP_DIR / backup.filename
     if not filepath.exists():
         log(f'Backup file not found: {backup.filename}', 'error')
@@ -67,17 +135,7 @@ async def upload_backup(backup: BackupHistory) -> bool:
         if file_size > MAX_FILE_SIZE:
             return await upload_split_file(bot, chat_ids, backup, filepath)
         
-        # 获取数据库名称（兼容宝塔备份没有关联数据库的情况）
-        db_name = backup.database.name if backup.database else backup.filename.split('_')[0]
-        duration = backup.duration if backup.duration else 0
-        
-        caption = (
-            f"🗄️ <b>Database Backup</b>\n"
-            f"📊 DB: {db_name}\n"
-            f"📁 File: {backup.filename}\n"
-            f"📏 Size: {backup.file_size_str}\n"
-            f"🔐 SHA256: <code>{backup.file_hash[:16]}...</code>"
-        )
+        caption = backup_caption(backup)
         
         with open(filepath, 'rb') as f:
             msg = await bot.send_document(
@@ -93,16 +151,17 @@ async def upload_backup(backup: BackupHistory) -> bool:
         db.session.commit()
         
         # Forward to other chats using file_id
-        for chat_id in chat_ids[1:]:
-            try:
-                await bot.send_document(
-                    chat_id=chat_id,
-                    document=backup.tg_file_id,
-                    caption=caption,
-                    parse_mode='HTML'
-                )
-            except TelegramError as e:
-                log(f'Failed to forward to {chat_id}: {e}', 'warning')
+        errors = await fan_out(
+            lambda chat_id: bot.send_document(
+                chat_id=chat_id,
+                document=backup.tg_file_id,
+                caption=caption,
+                parse_mode='HTML'
+            ),
+            chat_ids[1:]
+        )
+        for chat_id, e in errors.items():
+            log(f'Failed to forward to {chat_id}: {e}', 'warning')
         
         log(f'Uploaded backup to Telegram: {backup.filename}')
         return True
@@ -132,21 +191,52 @@ async def upload_split_file(bot: Bot, chat_ids: list, backup: BackupHistory, fil
     )
     
     with open(filepath, 'rb') as f:
-        for part_num in range(num_parts):
-            chunk = f.read(MAX_FILE_SIZE)
-            part_filename = f'{backup.filename}.part{part_num + 1:03d}'
-            
-            for chat_id in chat_ids:
+        if hasattr(os, 'posix_fadvise'):
+            # Large sequential read: let the kernel read ahead aggressively
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        
+        # Read the next part on a worker thread while the current one uploads
+        loop = asyncio.get_running_loop()
+        next_chunk = loop.run_in_executor(None, f.read, MAX_FILE_SIZE)
+        caption_template = f'Part {{part}}/{num_parts}'
+        try:
+            for part_num in range(num_parts):
+                chunk = await next_chunk
+                next_chunk = loop.run_in_executor(None, f.read, MAX_FILE_SIZE) if part_num + 1 < num_parts else None
+                part_filename = f'{backup.filename}.part{part_num + 1:03d}'
+                
+                caption = caption_template.format(part=part_num + 1)
+                
+                # Upload the bytes once, then send the remaining chats the part's file_id
                 try:
-                    await bot.send_document(
-                        chat_id=chat_id,
+                    msg = await bot.send_document(
+                        chat_id=chat_ids[0],
                         document=chunk,
                         filename=part_filename,
-                        caption=f"Part {part_num + 1}/{num_parts}"
+                        caption=caption
+                    )
+                    errors = await fan_out(
+                        lambda chat_id: bot.send_document(
+                            chat_id=chat_id,
+                            document=msg.document.file_id,
+                            filename=part_filename,
+                            caption=caption
+                        ),
+                        chat_ids[1:]
                     )
                 except TelegramError as e:
-                    log(f'Failed to upload part {part_num + 1} to {chat_id}: {e}', 'error')
+                    errors = {chat_ids[0]: e}
+                if errors:
+                    for chat_id, e in errors.items():
+                        log(f'Failed to upload part {part_num + 1} to {chat_id}: {e}', 'error')
                     return False
+        finally:
+            if next_chunk is not None:
+                # A read already running on the executor can't be cancelled;
+                # let it finish before the file closes under it
+                await asyncio.wait([next_chunk])
+                if not next_chunk.cancelled():
+                    next_chunk.exception()  # mark retrieved
     
     backup.tg_uploaded = True
     db.session.commit()
@@ -156,18 +246,8 @@ async def upload_split_file(bot: Bot, chat_ids: list, backup: BackupHistory, fil
 
 def sync_send_notification(message: str):
     """Synchronous wrapper for send_notification"""
-    try:
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-    return loop.run_until_complete(send_notification(message))
+    return run_sync(send_notification(message))
 
 def sync_upload_backup(backup: BackupHistory):
     """Synchronous wrapper for upload_backup"""
-    try:
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-    return loop.run_until_complete(upload_backup(backup))
+    return run_sync(upload_backup(backup))